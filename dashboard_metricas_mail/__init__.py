@@ -1 +1,8 @@
+from . import controllers
 from . import models
+
+
+def _post_init_hook(env):
+    # Attribute the existing orders at install instead of waiting for the
+    # first cron run, which then only refreshes the changes since this one
+    env['marketing.dashboard.attribution']._cron_refresh()
@@ -52,6 +52,7 @@
     ''',
     'depends': [
         'base',
+        'bus',
         'mass_mailing',
         'web',
         'utm',
@@ -59,6 +60,7 @@
     ],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/marketing_dashboard_menus.xml',
     ],
     'assets': {
@@ -66,6 +68,7 @@
             'dashboard_metricas_mail/static/src/dashboard/**/*',
         ],
     },
+    'post_init_hook': '_post_init_hook',
     'images': [],
     'installable': True,
     'application': False,
@@ -0,0 +1,98 @@
+import codecs
+import csv
+import io
+import os
+import tempfile
+
+from odoo import api, fields, http, _
+from odoo.exceptions import UserError
+from odoo.http import content_disposition, request
+from odoo.modules.registry import Registry
+from odoo.tools.misc import xlsxwriter
+
+# Size of the chunks sent to the client
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv;charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class DashboardExportController(http.Controller):
+
+    @http.route('/dashboard_metricas_mail/export/<string:file_format>', type='http', auth='user', methods=['GET'])
+    def export_mailing_metrics(self, file_format, campaign_id=None, mailing_id=None, date_from=None, date_to=None, **kwargs):
+        """
+        Stream the per-mailing metrics matching the dashboard filters as a CSV
+        or XLSX file. Rows are computed while the response is sent, with their
+        own cursor since the request cursor is closed by then.
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise request.not_found()
+        if file_format == 'xlsx' and not xlsxwriter:
+            raise UserError(_("The Python library xlsxwriter is required to export XLSX files."))
+        try:
+            filter_args = (
+                int(campaign_id) if campaign_id else None,
+                int(mailing_id) if mailing_id else None,
+                fields.Date.to_string(fields.Date.to_date(date_from)) if date_from else None,
+                fields.Date.to_string(fields.Date.to_date(date_to)) if date_to else None,
+            )
+        except ValueError:
+            raise request.not_found()
+        # Fail before streaming when the user cannot read the mailings at all
+        request.env['mailing.mailing'].check_access('read')
+
+        rows = self._iter_rows(request.env.cr.dbname, request.env.uid, dict(request.env.context), filter_args)
+        stream = self._stream_csv(rows) if file_format == 'csv' else self._stream_xlsx(rows, _("Mailings"))
+        filename = f"mailing_metrics_{fields.Date.context_today(request.env.user)}.{file_format}"
+        return request.make_response(stream, headers=[
+            ('Content-Type', EXPORT_FORMATS[file_format]),
+            ('Content-Disposition', content_disposition(filename)),
+            ('X-Accel-Buffering', 'no'),
+        ])
+
+    def _iter_rows(self, dbname, uid, context, filter_args):
+        """
+        Header then one row per mailing, read with a dedicated read-only cursor.
+        """
+        with Registry(dbname).cursor(readonly=True) as cr:
+            handler = api.Environment(cr, uid, context)['marketing.dashboard.handler']
+            yield handler._get_export_header()
+            yield from handler._iter_export_rows(*filter_args)
+
+    def _stream_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # The BOM lets spreadsheet applications detect the encoding
+        yield codecs.BOM_UTF8
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    def _stream_xlsx(self, rows, sheet_name):
+        """
+        An XLSX file is a zip archive that can only be sent once complete: rows
+        are flushed to a temporary file as they come (constant_memory mode),
+        then the file is streamed by chunks and removed.
+        """
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'tmpdir': tempfile.gettempdir()})
+            worksheet = workbook.add_worksheet(sheet_name)
+            header_style = workbook.add_format({'bold': True})
+            for row_index, row in enumerate(rows):
+                worksheet.write_row(row_index, 0, row, header_style if row_index == 0 else None)
+            workbook.close()
+            with open(path, 'rb') as xlsx_file:
+                while chunk := xlsx_file.read(CHUNK_SIZE):
+                    yield chunk
+        finally:
+            os.unlink(path)
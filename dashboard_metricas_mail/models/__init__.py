@@ -1 +1,9 @@
 from . import marketing_dashboard_handler
+from . import marketing_dashboard_daily_stat
+from . import marketing_dashboard_attribution
+from . import marketing_dashboard_snapshot
+from . import ir_websocket
+from . import link_tracker_click
+from . import mailing_contact
+from . import mailing_trace
+from . import sale_order
@@ -0,0 +1,18 @@
+from odoo import models
+
+from .marketing_dashboard_handler import BUS_CHANNEL_PREFIX
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        # Dashboard channels are plain strings: only keep those the user may read
+        dashboard_channels = [
+            channel for channel in channels
+            if isinstance(channel, str) and channel.startswith(BUS_CHANNEL_PREFIX)
+        ]
+        if dashboard_channels:
+            channels = [channel for channel in channels if channel not in dashboard_channels]
+            channels += self.env['marketing.dashboard.handler']._get_allowed_bus_channels(dashboard_channels)
+        return super()._build_bus_channel_list(channels)
@@ -0,0 +1,27 @@
+from collections import Counter, defaultdict
+
+from odoo import models, api
+from odoo.tools.sql import create_index
+
+
+class LinkTrackerClick(models.Model):
+    _inherit = 'link.tracker.click'
+
+    def init(self):
+        super().init()
+        # Top links count the clicks of the filtered mailings within a date window
+        create_index(self.env.cr, 'link_tracker_click_mass_mailing_id_create_date_index', self._table, ['mass_mailing_id', 'create_date'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        clicks = super().create(vals_list)
+        # Live click counts of the top links
+        handler = self.env['marketing.dashboard.handler']
+        links = defaultdict(Counter)
+        for click in clicks:
+            if click.link_id:
+                bucket = handler._get_delta_bucket(click.create_date)
+                links[(click.mass_mailing_id.id, click.campaign_id.id, bucket)][click.link_id.id] += 1
+        if links:
+            handler._queue_dashboard_deltas({}, links=links)
+        return clicks
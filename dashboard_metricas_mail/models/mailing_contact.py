@@ -0,0 +1,21 @@
+from odoo import models, api
+
+
+class MailingContact(models.Model):
+    _inherit = 'mailing.contact'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return res
@@ -0,0 +1,79 @@
+from collections import Counter, defaultdict
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from .marketing_dashboard_handler import SENT_STATUSES, DELIVERED_STATUSES
+
+# Fields changing the dashboard counters of a trace (besides its status)
+DASHBOARD_FIELDS = {'mass_mailing_id', 'open_datetime', 'links_click_datetime', 'reply_datetime'}
+
+
+class MailingTrace(models.Model):
+    _inherit = 'mailing.trace'
+
+    def init(self):
+        super().init()
+        # Dashboard aggregates count status buckets per mailing, optionally within a date window
+        status_field = 'trace_status' if 'trace_status' in self._fields else 'state'
+        create_index(self.env.cr, 'mailing_trace_mass_mailing_id_status_index', self._table, ['mass_mailing_id', status_field])
+        create_index(self.env.cr, 'mailing_trace_mass_mailing_id_create_date_index', self._table, ['mass_mailing_id', 'create_date'])
+        create_index(self.env.cr, 'mailing_trace_create_date_index', self._table, ['create_date'])
+        # Order attribution looks up the clicks of partners by record, and of
+        # mailing contacts by email
+        create_index(self.env.cr, 'mailing_trace_res_id_model_index', self._table, ['res_id', 'model'])
+        create_index(self.env.cr, 'mailing_trace_email_index', self._table, ['email'])
+        # The incremental refreshes look for traces written since their high-water mark
+        create_index(self.env.cr, 'mailing_trace_write_date_index', self._table, ['write_date'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        handler = self.env['marketing.dashboard.handler']
+        handler._invalidate_dashboard_cache()
+        handler._queue_dashboard_deltas(records._get_dashboard_counters())
+        return records
+
+    def write(self, vals):
+        status_field = 'trace_status' if 'trace_status' in self._fields else 'state'
+        tracked = bool((DASHBOARD_FIELDS | {status_field}) & set(vals))
+        before = self._get_dashboard_counters() if tracked else None
+        res = super().write(vals)
+        handler = self.env['marketing.dashboard.handler']
+        handler._invalidate_dashboard_cache()
+        if tracked:
+            handler._queue_dashboard_deltas(self._get_dashboard_counters(), before)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return res
+
+    def _get_dashboard_counters(self):
+        """
+        Dashboard counters of the traces, grouped by (mailing, campaign, UTC
+        slice of the creation time) like the live aggregation of
+        marketing.dashboard.handler.
+        """
+        status_field = 'trace_status' if 'trace_status' in self._fields else 'state'
+        handler = self.env['marketing.dashboard.handler']
+        counters = defaultdict(Counter)
+        for trace in self:
+            status = trace[status_field]
+            key = (
+                trace.mass_mailing_id.id,
+                trace.mass_mailing_id.campaign_id.id,
+                handler._get_delta_bucket(trace.create_date),
+            )
+            counters[key].update({
+                'total': 1,
+                'sent': int(status in SENT_STATUSES),
+                'delivered': int(status in DELIVERED_STATUSES),
+                'bounced': int(status == 'bounce'),
+                'exception': int(status not in SENT_STATUSES),
+                'opened': int(bool(trace.open_datetime)),
+                'clicked': int(bool(trace.links_click_datetime)),
+                'replied': int(bool(trace.reply_datetime)),
+            })
+        return counters
@@ -0,0 +1,224 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+from ..tools.incremental_refresh import run_incremental_refresh
+
+# System parameter storing the write_date high-water mark of the last refresh
+HWM_PARAM = 'dashboard_metricas_mail.attribution_hwm'
+# Days before an order during which a click of its customer on a mailing
+# attributes the order to that mailing, overridable with the
+# dashboard_metricas_mail.attribution_window_days system parameter (0 disables it)
+DEFAULT_ATTRIBUTION_WINDOW_DAYS = 30
+# Orders written in the transaction, refreshed together before the commit
+PRECOMMIT_KEY = 'dashboard_metricas_mail.attribution_orders'
+# Order fields the attribution depends on (the others are related fields kept
+# up to date by the ORM)
+ORDER_FIELDS = {'source_id', 'partner_id', 'date_order', 'state'}
+
+
+class MarketingDashboardAttribution(models.Model):
+    _name = 'marketing.dashboard.attribution'
+    _description = 'Marketing Dashboard Order Attribution'
+    _order = 'date_order desc, id'
+    _rec_name = 'order_id'
+
+    order_id = fields.Many2one('sale.order', string='Order', required=True, index=True, ondelete='cascade', readonly=True)
+    mailing_id = fields.Many2one('mailing.mailing', string='Mailing', required=True, index=True, ondelete='cascade', readonly=True)
+    campaign_id = fields.Many2one('utm.campaign', string='Campaign', index=True, ondelete='set null', readonly=True)
+    attribution_type = fields.Selection([
+        ('source', 'UTM Source'),
+        ('partner_click', 'Customer Click'),
+    ], string='Attribution', required=True, readonly=True)
+    trace_id = fields.Many2one('mailing.trace', string='Clicked Trace', ondelete='set null', readonly=True)
+
+    # Order figures read by the revenue sections, kept in sync by the ORM
+    date_order = fields.Datetime(related='order_id.date_order', store=True, index=True)
+    state = fields.Selection(related='order_id.state', store=True)
+    invoice_status = fields.Selection(related='order_id.invoice_status', store=True)
+    amount_total = fields.Monetary(related='order_id.amount_total', store=True)
+    currency_id = fields.Many2one(related='order_id.currency_id', store=True)
+    company_id = fields.Many2one(related='order_id.company_id', store=True)
+
+    _sql_constraints = [
+        ('order_uniq', 'unique(order_id)', 'An order is attributed to a single mailing.'),
+    ]
+
+    def init(self):
+        # Revenue sections select the attributions of some mailings within a date window
+        create_index(self.env.cr, 'marketing_dashboard_attribution_mailing_id_date_order_index', self._table, ['mailing_id', 'date_order'])
+
+    @api.model
+    def _queue_orders(self, orders):
+        """
+        Refresh the attribution of ``orders`` before the transaction commits,
+        once for all the orders written meanwhile.
+        """
+        if not orders:
+            return
+        precommit = self.env.cr.precommit
+        order_ids = precommit.data.get(PRECOMMIT_KEY)
+        if order_ids is None:
+            order_ids = precommit.data[PRECOMMIT_KEY] = set()
+            precommit.add(self._flush_queued_orders)
+        order_ids.update(orders.ids)
+
+    @api.model
+    def _flush_queued_orders(self):
+        order_ids = self.env.cr.precommit.data.pop(PRECOMMIT_KEY, set())
+        self._refresh_orders(order_ids)
+
+    @api.model
+    def _cron_refresh(self):
+        """
+        Incrementally refresh the attributions: orders written since the last
+        run, orders of mailings whose source changed, and orders of customers
+        who clicked since. The first run (or a run after the high-water mark
+        was removed) rebuilds everything.
+        """
+        run_incremental_refresh(
+            self.env, HWM_PARAM,
+            lambda since: self._refresh_orders(self._get_touched_order_ids(since)),
+            lambda: self._refresh_orders(None),
+        )
+
+    @api.model
+    def _get_touched_order_ids(self, since):
+        self.env.cr.execute(SQL(
+            """
+            SELECT id FROM sale_order
+             WHERE write_date >= %(since)s
+             UNION
+            SELECT so.id FROM sale_order so
+              JOIN mailing_mailing mailing ON mailing.source_id = so.source_id
+             WHERE mailing.write_date >= %(since)s
+             UNION
+            -- Clicks of the customer or of its company, like _refresh_orders
+            SELECT so.id FROM mailing_trace trace
+              JOIN sale_order so ON so.partner_id = trace.res_id
+             WHERE trace.model = 'res.partner' AND trace.write_date >= %(since)s
+               AND trace.links_click_datetime <= so.date_order
+             UNION
+            SELECT so.id FROM mailing_trace trace
+              JOIN res_partner partner ON partner.commercial_partner_id = trace.res_id
+              JOIN sale_order so ON so.partner_id = partner.id
+             WHERE trace.model = 'res.partner' AND trace.write_date >= %(since)s
+               AND trace.links_click_datetime <= so.date_order
+             UNION
+            -- Clicks of other recipients (mailing contacts, ...) by email address
+            SELECT so.id FROM mailing_trace trace
+              JOIN res_partner partner ON partner.email_normalized = trace.email
+              JOIN sale_order so ON so.partner_id = partner.id
+             WHERE trace.model != 'res.partner' AND trace.write_date >= %(since)s
+               AND trace.links_click_datetime <= so.date_order
+             UNION
+            SELECT so.id FROM mailing_trace trace
+              JOIN res_partner commercial ON commercial.email_normalized = trace.email
+              JOIN res_partner partner ON partner.commercial_partner_id = commercial.id
+              JOIN sale_order so ON so.partner_id = partner.id
+             WHERE trace.model != 'res.partner' AND trace.write_date >= %(since)s
+               AND trace.links_click_datetime <= so.date_order
+            """,
+            since=since,
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _refresh_orders(self, order_ids):
+        """
+        Recompute the attribution of the given orders (all orders when None).
+        An order whose UTM source belongs to a mailing is attributed to that
+        mailing. Otherwise, it is attributed to the mailing its customer (or
+        the customer's company) last clicked within the attribution window
+        before the order date: traces of partners match by id, traces of
+        other recipients (mailing contacts, ...) by normalized email. Single
+        touch: each order counts once.
+        """
+        if order_ids is not None and not order_ids:
+            return
+
+        # Orders, mailings and traces are read in SQL, and the pending recomputations
+        # of the related fields must not target the rows deleted below
+        self.env.flush_all()
+
+        if order_ids is None:
+            delete_filter = SQL()
+            order_filter = SQL()
+        else:
+            order_ids = tuple(order_ids)
+            delete_filter = SQL("WHERE order_id IN %s", order_ids)
+            order_filter = SQL("AND so.id IN %s", order_ids)
+
+        window_days = self.env['marketing.dashboard.handler']._get_cache_param(
+            'attribution_window_days', DEFAULT_ATTRIBUTION_WINDOW_DAYS,
+        )
+        click_attribution = SQL()
+        if window_days > 0:
+            click_attribution = SQL(
+                """
+                UNION ALL (
+                    SELECT DISTINCT ON (so.id) so.id, trace.mass_mailing_id, mailing.campaign_id, 'partner_click', trace.id
+                      FROM sale_order so
+                      JOIN res_partner partner ON partner.id = so.partner_id
+                      JOIN res_partner commercial ON commercial.id = partner.commercial_partner_id
+                      JOIN LATERAL (
+                          SELECT id, mass_mailing_id, links_click_datetime
+                            FROM mailing_trace
+                           WHERE model = 'res.partner'
+                             AND res_id IN (partner.id, commercial.id)
+                             AND links_click_datetime <= so.date_order
+                             AND links_click_datetime >= so.date_order - make_interval(days => %(window)s)
+                           UNION ALL
+                          SELECT id, mass_mailing_id, links_click_datetime
+                            FROM mailing_trace
+                           WHERE model != 'res.partner'
+                             AND email IN (partner.email_normalized, commercial.email_normalized)
+                             AND links_click_datetime <= so.date_order
+                             AND links_click_datetime >= so.date_order - make_interval(days => %(window)s)
+                      ) trace ON TRUE
+                      JOIN mailing_mailing mailing ON mailing.id = trace.mass_mailing_id
+                     WHERE NOT EXISTS (SELECT 1 FROM source_mailing WHERE source_mailing.source_id = so.source_id)
+                           %(order_filter)s
+                  ORDER BY so.id, trace.links_click_datetime DESC, trace.id DESC
+                )
+                """,
+                window=window_days,
+                order_filter=order_filter,
+            )
+
+        self.env.cr.execute(SQL("DELETE FROM marketing_dashboard_attribution %s", delete_filter))
+        self.env.cr.execute(SQL(
+            """
+            WITH source_mailing AS (
+                -- A source normally belongs to a single mailing, keep the first one otherwise
+                SELECT DISTINCT ON (source_id) source_id, id AS mailing_id, campaign_id
+                  FROM mailing_mailing
+                 WHERE source_id IS NOT NULL
+              ORDER BY source_id, id
+            ), attribution AS (
+                SELECT so.id AS order_id, source_mailing.mailing_id, source_mailing.campaign_id,
+                       'source' AS attribution_type, NULL::integer AS trace_id
+                  FROM sale_order so
+                  JOIN source_mailing ON source_mailing.source_id = so.source_id
+                 WHERE TRUE %(order_filter)s
+                %(click_attribution)s
+            )
+            INSERT INTO marketing_dashboard_attribution (
+                order_id, mailing_id, campaign_id, attribution_type, trace_id,
+                date_order, state, invoice_status, amount_total, currency_id, company_id,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT attribution.order_id, attribution.mailing_id, attribution.campaign_id,
+                   attribution.attribution_type, attribution.trace_id,
+                   so.date_order, so.state, so.invoice_status, so.amount_total, so.currency_id, so.company_id,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM attribution
+              JOIN sale_order so ON so.id = attribution.order_id
+            """,
+            order_filter=order_filter,
+            click_attribution=click_attribution,
+            uid=self.env.uid,
+            now=self.env.cr.now(),
+        ))
+        self.invalidate_model()
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
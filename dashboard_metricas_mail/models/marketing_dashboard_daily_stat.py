@@ -0,0 +1,237 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+from ..tools.incremental_refresh import run_incremental_refresh
+from .marketing_dashboard_handler import SENT_STATUSES, DELIVERED_STATUSES
+
+# System parameter storing the write_date high-water mark of the last refresh
+HWM_PARAM = 'dashboard_metricas_mail.daily_stat_hwm'
+# System parameter storing the timezone of the rollup days: the one of the
+# company when the rollup was last rebuilt, UTC for rollups built before
+TZ_PARAM = 'dashboard_metricas_mail.daily_stat_tz'
+
+# Counters stored per mailing and day, named like the keys of the live trace aggregation
+TRACE_COUNTERS = ['total', 'sent', 'delivered', 'bounced', 'exception', 'opened', 'clicked', 'replied']
+ORDER_COUNTERS = ['invoiced_revenue', 'invoiced_count', 'potential_revenue', 'potential_count']
+
+
+class MarketingDashboardDailyStat(models.Model):
+    _name = 'marketing.dashboard.daily.stat'
+    _description = 'Marketing Dashboard Daily Statistics'
+    _order = 'date desc, mailing_id'
+    _rec_name = 'mailing_id'
+
+    # Day in the rollup timezone, see _get_rollup_tz
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+    mailing_id = fields.Many2one('mailing.mailing', string='Mailing', required=True, index=True, ondelete='cascade', readonly=True)
+    campaign_id = fields.Many2one('utm.campaign', string='Campaign', index=True, ondelete='set null', readonly=True)
+    # Company and currency of the orders of a conversion line, empty on the line
+    # of the traces (each mailing and day has one line of traces and one line per
+    # order company and currency)
+    company_id = fields.Many2one('res.company', string='Company', index=True, ondelete='cascade', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', ondelete='cascade', readonly=True)
+
+    # Deliverability & Engagement (mailing.trace created that day)
+    total = fields.Integer(string='Total', readonly=True)
+    sent = fields.Integer(string='Sent', readonly=True)
+    delivered = fields.Integer(string='Delivered', readonly=True)
+    bounced = fields.Integer(string='Bounced', readonly=True)
+    exception = fields.Integer(string='Exception', readonly=True)
+    opened = fields.Integer(string='Opened', readonly=True)
+    clicked = fields.Integer(string='Clicked', readonly=True)
+    replied = fields.Integer(string='Replied', readonly=True)
+
+    # Conversion (sale.order dated that day, attributed to the mailing), in the
+    # order currency, converted when read like the live figures
+    invoiced_revenue = fields.Float(string='Invoiced Revenue', readonly=True)
+    invoiced_count = fields.Integer(string='Invoiced Orders', readonly=True)
+    potential_revenue = fields.Float(string='Potential Revenue', readonly=True)
+    potential_count = fields.Integer(string='Potential Orders', readonly=True)
+
+    _sql_constraints = [
+        ('mailing_date_uniq', 'unique(mailing_id, date, company_id, currency_id)', 'Only one statistic line is allowed per mailing, day, company and currency.'),
+    ]
+
+    @api.model
+    def _get_totals(self, mailing_ids=None, date_from=None, date_to=None):
+        """
+        Sum every counter of the rollup, optionally restricted to some mailings
+        and to an inclusive range of days in the rollup timezone. Conversion
+        lines are limited to the companies of the environment.
+        Returns a dict keyed like TRACE_COUNTERS + ORDER_COUNTERS.
+        The rollup holds revenue and is only readable by administrators: it is
+        read with sudo(), by users whose orders are not restricted by record
+        rules (see marketing.dashboard.handler _use_rollup).
+        """
+        domain = [('mailing_id', 'in', mailing_ids)] if mailing_ids is not None else []
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        values = self._read_group(
+            domain + [('company_id', '=', False)], [], [f'{name}:sum' for name in TRACE_COUNTERS],
+        )[0]
+        totals = {name: value or 0 for name, value in zip(TRACE_COUNTERS, values)}
+        totals.update(dict.fromkeys(ORDER_COUNTERS, 0))
+
+        # Revenue is converted per currency and company like the live figures
+        handler = self.env['marketing.dashboard.handler']
+        order_groups = self._read_group(
+            domain + [('company_id', 'in', self.env.companies.ids)],
+            ['currency_id', 'company_id'], [f'{name}:sum' for name in ORDER_COUNTERS],
+        )
+        for currency, company, invoiced_revenue, invoiced_count, potential_revenue, potential_count in order_groups:
+            totals['invoiced_revenue'] += handler._convert_revenue(invoiced_revenue, currency, company)
+            totals['invoiced_count'] += invoiced_count or 0
+            totals['potential_revenue'] += handler._convert_revenue(potential_revenue, currency, company)
+            totals['potential_count'] += potential_count or 0
+        return totals
+
+    @api.model
+    def _cron_refresh(self):
+        """
+        Incrementally refresh the rollup: only the mailings with traces, orders
+        or settings written since the last run are recomputed. The first run
+        (or a run after the high-water mark was removed or the company timezone
+        changed) rebuilds everything.
+        """
+        run_incremental_refresh(
+            self.env, HWM_PARAM,
+            lambda since: self._refresh_mailings(self._get_touched_mailing_ids(since)),
+            lambda: self._refresh_mailings(None),
+            # A change of the company timezone moves every day boundary
+            incremental=self._get_rollup_tz() == self._get_company_tz(),
+        )
+
+    @api.model
+    def _get_rollup_tz(self):
+        """
+        Timezone of the days of the stored rollup.
+        """
+        return self.env['ir.config_parameter'].sudo().get_param(TZ_PARAM) or 'UTC'
+
+    @api.model
+    def _get_company_tz(self):
+        return self.env.company.partner_id.tz or 'UTC'
+
+    @api.model
+    def _get_touched_mailing_ids(self, since):
+        """
+        Mailings whose traces, attributed orders or own values changed since ``since``.
+        Attributions rebuilt since then count as changed orders.
+        """
+        self.env.cr.execute(SQL(
+            """
+            SELECT mass_mailing_id FROM mailing_trace
+             WHERE write_date >= %(since)s AND mass_mailing_id IS NOT NULL
+             UNION
+            SELECT attribution.mailing_id FROM marketing_dashboard_attribution attribution
+              JOIN sale_order so ON so.id = attribution.order_id
+             WHERE so.write_date >= %(since)s OR attribution.write_date >= %(since)s
+             UNION
+            SELECT id FROM mailing_mailing
+             WHERE write_date >= %(since)s
+            """,
+            since=since,
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _refresh_mailings(self, mailing_ids):
+        """
+        Recompute all the daily lines of the given mailings (all mailings when None).
+        Whole mailings are recomputed so that traces or orders moving from one day
+        to another never leave a stale line behind.
+        Days are those of the company timezone on a full rebuild, and of the
+        stored rollup otherwise, so that every line uses the same boundaries.
+        """
+        if mailing_ids is not None and not mailing_ids:
+            return
+        tz = self._get_company_tz() if mailing_ids is None else self._get_rollup_tz()
+
+        Trace = self.env['mailing.trace']
+        status_field = 'trace_status' if 'trace_status' in Trace._fields else 'state'
+        status = SQL.identifier('trace', status_field)
+
+        if mailing_ids is None:
+            delete_filter = SQL()
+            trace_filter = SQL()
+            order_filter = SQL()
+        else:
+            mailing_ids = tuple(mailing_ids)
+            delete_filter = SQL("WHERE mailing_id IN %s", mailing_ids)
+            trace_filter = SQL("AND trace.mass_mailing_id IN %s", mailing_ids)
+            order_filter = SQL("WHERE attribution.mailing_id IN %s", mailing_ids)
+
+        self.env.cr.execute(SQL("DELETE FROM marketing_dashboard_daily_stat %s", delete_filter))
+
+        self.env.cr.execute(SQL(
+            """
+            WITH trace_days AS (
+                SELECT trace.mass_mailing_id AS mailing_id,
+                       %(trace_day)s AS date,
+                       COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE %(status)s IN %(sent_statuses)s) AS sent,
+                       COUNT(*) FILTER (WHERE %(status)s IN %(delivered_statuses)s) AS delivered,
+                       COUNT(*) FILTER (WHERE %(status)s = 'bounce') AS bounced,
+                       COUNT(trace.open_datetime) AS opened,
+                       COUNT(trace.links_click_datetime) AS clicked,
+                       COUNT(trace.reply_datetime) AS replied
+                  FROM mailing_trace trace
+                 WHERE trace.mass_mailing_id IS NOT NULL %(trace_filter)s
+              GROUP BY 1, 2
+            ), order_days AS (
+                SELECT attribution.mailing_id,
+                       %(order_day)s AS date,
+                       so.company_id,
+                       so.currency_id,
+                       COALESCE(SUM(%(amount)s) FILTER (WHERE %(invoiced)s), 0) AS invoiced_revenue,
+                       COUNT(*) FILTER (WHERE %(invoiced)s) AS invoiced_count,
+                       COALESCE(SUM(%(amount)s) FILTER (WHERE %(potential)s), 0) AS potential_revenue,
+                       COUNT(*) FILTER (WHERE %(potential)s) AS potential_count
+                  FROM marketing_dashboard_attribution attribution
+                  JOIN sale_order so ON so.id = attribution.order_id
+                  %(order_filter)s
+              GROUP BY 1, 2, 3, 4
+            )
+            INSERT INTO marketing_dashboard_daily_stat (
+                mailing_id, campaign_id, date, company_id, currency_id,
+                total, sent, delivered, bounced, exception, opened, clicked, replied,
+                invoiced_revenue, invoiced_count, potential_revenue, potential_count,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT t.mailing_id, mailing.campaign_id, t.date, NULL, NULL,
+                   t.total, t.sent, t.delivered, t.bounced, t.total - t.sent,
+                   t.opened, t.clicked, t.replied,
+                   0, 0, 0, 0,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM trace_days t
+              JOIN mailing_mailing mailing ON mailing.id = t.mailing_id
+             UNION ALL
+            SELECT o.mailing_id, mailing.campaign_id, o.date, o.company_id, o.currency_id,
+                   0, 0, 0, 0, 0, 0, 0, 0,
+                   o.invoiced_revenue, o.invoiced_count, o.potential_revenue, o.potential_count,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM order_days o
+              JOIN mailing_mailing mailing ON mailing.id = o.mailing_id
+            """,
+            status=status,
+            # Datetimes are stored in UTC
+            trace_day=SQL("(trace.create_date AT TIME ZONE 'UTC' AT TIME ZONE %s)::date", tz),
+            order_day=SQL("(so.date_order AT TIME ZONE 'UTC' AT TIME ZONE %s)::date", tz),
+            sent_statuses=SENT_STATUSES,
+            delivered_statuses=DELIVERED_STATUSES,
+            amount=SQL("so.amount_total"),
+            # Same buckets as get_conversion_metrics
+            invoiced=SQL("so.state IN ('sale', 'done') AND so.invoice_status = 'invoiced'"),
+            potential=SQL(
+                "so.state IN ('draft', 'sent') OR (so.state = 'sale' AND so.invoice_status IS DISTINCT FROM 'invoiced')"
+            ),
+            trace_filter=trace_filter,
+            order_filter=order_filter,
+            uid=self.env.uid,
+            now=self.env.cr.now(),
+        ))
+        self.invalidate_model()
+        if mailing_ids is None:
+            self.env['ir.config_parameter'].sudo().set_param(TZ_PARAM, tz)
@@ -1,14 +1,400 @@
-from odoo import models, fields, api
-from datetime import timedelta
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+from odoo.http import request
+from odoo.tools import SQL, str2bool
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from dateutil.relativedelta import relativedelta
+from psycopg2.errors import QueryCanceled
+from time import perf_counter
+import logging
+import math
+import os
+import pytz
+
+from ..tools.dashboard_cache import get_dashboard_cache
+from ..tools.replica import get_replica_pool, report_lag, track_lag
+from .marketing_dashboard_snapshot import DEFAULT_SNAPSHOT_MAX_AGE
+
+_logger = logging.getLogger(__name__)
+
+# Default lifetime (seconds) and capacity of the get_dashboard_data cache,
+# overridable with the dashboard_metricas_mail.cache_ttl / cache_size system parameters
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_SIZE = 256
+# Each worker keeps its own cache: this sequence is bumped after every commit
+# that invalidates the dashboards and its value is part of the cache keys, so
+# the entries cached by the other workers stop being used
+CACHE_GENERATION_SEQUENCE = 'marketing_dashboard_cache_generation'
+
+# Dashboard sections, each one can also be fetched on its own with get_panel_data
+# or with the other sections of its group with get_panels_data
+DASHBOARD_PANELS = (
+    'deliverability', 'engagement', 'conversion', 'list_health', 'campaign_stages',
+    'top_links', 'top_campaigns', 'top_mailings', 'ab_testing',
+)
+# Sections that do not depend on the mailing filter
+GLOBAL_PANELS = {'list_health', 'campaign_stages'}
+# Sections built on top of the trace aggregation
+TRACE_PANELS = {'deliverability', 'engagement', 'conversion'}
+
+# Approximate mode (dashboard_metricas_mail.approximate_mode): the exact trace
+# aggregate gets this budget (milliseconds, dashboard_metricas_mail.exact_timeout_ms,
+# 0 skips it) before falling back to an estimate computed on this percentage of
+# the table blocks (dashboard_metricas_mail.sample_percent), with the confidence
+# bounds of the rates at this z-score (95%)
+DEFAULT_EXACT_TIMEOUT_MS = 5000
+DEFAULT_SAMPLE_PERCENT = 1.0
+APPROXIMATE_Z_SCORE = 1.96
+
+# Largest replication lag (seconds) of the read replica before the aggregates go
+# back to the primary, overridable with the dashboard_metricas_mail.replica_max_lag
+# system parameter (the replica itself is configured in odoo.conf, see tools/replica.py)
+DEFAULT_REPLICA_MAX_LAG = 30
+
+# Sections slower than this (milliseconds) are logged, overridable with the
+# dashboard_metricas_mail.slow_section_ms system parameter (0 disables the log)
+DEFAULT_SLOW_SECTION_MS = 1000
+
+# Links of the Top Clicked Links panel, overridable with the
+# dashboard_metricas_mail.top_links_limit system parameter, and the default
+# and largest page of the "all links" view
+DEFAULT_TOP_LINKS_LIMIT = 5
+DEFAULT_LINK_RANKING_LIMIT = 50
+MAX_LINK_RANKING_LIMIT = 200
+
+# Page size of the filter typeahead, and the largest page a client may request
+DEFAULT_FILTER_OPTIONS_LIMIT = 20
+MAX_FILTER_OPTIONS_LIMIT = 200
+
+# Time-series: supported metrics, bucket sizes (finest first) and the maximum
+# number of buckets sent to the browser before switching to a coarser bucket
+TIMESERIES_METRICS = ('opens', 'clicks', 'bounces', 'revenue')
+TIMESERIES_GRANULARITIES = {
+    'day': relativedelta(days=1),
+    'week': relativedelta(weeks=1),
+    'month': relativedelta(months=1),
+    'quarter': relativedelta(months=3),
+    'year': relativedelta(years=1),
+}
+MAX_TIMESERIES_POINTS = 120
+
+# A/B tests: number of test groups (campaigns) detailed in the panel, p-value
+# under which the winner is considered significant, and the variant figure
+# compared by each winner selection mode with the base of its ratio
+MAX_AB_TESTS = 10
+AB_SIGNIFICANCE_LEVEL = 0.05
+AB_WINNER_CRITERIA = {
+    'opened_ratio': ('opened', 'delivered'),
+    'clicks_ratio': ('clicked', 'delivered'),
+    'replied_ratio': ('replied', 'delivered'),
+    'sale_quotation_count': ('quotations', 'delivered'),
+    'sale_invoiced_amount': ('invoiced_count', 'delivered'),
+}
+DEFAULT_AB_WINNER_CRITERION = 'opened_ratio'
+
+# Mailings aggregated per batch by the export, overridable with the
+# dashboard_metricas_mail.export_batch_size system parameter
+DEFAULT_EXPORT_BATCH_SIZE = 500
+
+# Bus channels of the live counter deltas: every trace change is published on the
+# global channel of the company and on the channels of its mailing and campaign
+BUS_CHANNEL_PREFIX = 'dashboard_metricas_mail.'
+BUS_GLOBAL_CHANNEL_PREFIX = 'dashboard_metricas_mail.global_'
+BUS_DELTA_TYPE = 'dashboard_metricas_mail/delta'
+# Deltas are grouped by UTC slices of this many minutes, and each client maps
+# them to the days of its own timezone (every UTC offset is a multiple of it)
+BUS_DELTA_BUCKET_MINUTES = 15
+
+# Statuses considered as "successfully sent" (bounce included, the mail left the server)
+SENT_STATUSES = ('sent', 'open', 'reply', 'click', 'bounce', 'delivered')
+# Statuses considered as "reached the recipient" (bounce excluded)
+DELIVERED_STATUSES = ('sent', 'open', 'reply', 'click', 'delivered')
+
+
+class DashboardFilters:
+    """
+    Mailing filter resolved once per dashboard request.
+    Holds the ids of the matching mailings so every section can reuse them
+    instead of searching mailing.mailing again.
+    """
+
+    def __init__(self, domain, mailing_ids, date_range=None):
+        self.domain = domain
+        self.mailing_ids = mailing_ids
+        # (first day, last day, UTC start, UTC exclusive end) of the date window, see _get_date_range
+        self.date_range = date_range or (None, None, None, None)
+
+    @property
+    def date_from(self):
+        return self.date_range[0]
+
+    @property
+    def date_to(self):
+        return self.date_range[1]
+
+    @property
+    def is_filtered(self):
+        return bool(self.domain)
+
+    @property
+    def is_empty(self):
+        # A filter is set but no mailing matches it
+        return self.is_filtered and not self.mailing_ids
+
+    def mailing_domain(self):
+        return [('id', 'in', self.mailing_ids)] if self.is_filtered else []
+
+    def trace_domain(self):
+        domain = [('mass_mailing_id', 'in', self.mailing_ids)] if self.is_filtered else []
+        # Traces are dated by their creation, set when the mailing is sent
+        return domain + self.date_domain('create_date')
+
+    def date_domain(self, field_name):
+        """
+        Restrict a datetime field to the date window (empty without window).
+        """
+        _first_day, _last_day, start, end = self.date_range
+        domain = []
+        if start:
+            domain.append((field_name, '>=', start))
+        if end:
+            domain.append((field_name, '<', end))
+        return domain
+
+def _two_proportion_p_value(successes_a, total_a, successes_b, total_b):
+    """
+    Two-sided p-value of a two-proportion z-test, None when it cannot be computed.
+    """
+    if not total_a or not total_b:
+        return None
+    pooled = (successes_a + successes_b) / (total_a + total_b)
+    std_error = math.sqrt(pooled * (1 - pooled) * (1 / total_a + 1 / total_b))
+    if not std_error:
+        return None
+    z_score = (successes_a / total_a - successes_b / total_b) / std_error
+    return math.erfc(abs(z_score) / math.sqrt(2))
+
+
+def _wilson_interval(successes, total, z_score=APPROXIMATE_Z_SCORE):
+    """
+    Wilson score interval of a proportion, as percentages (0-100).
+    """
+    if not total:
+        return [0.0, 100.0]
+    ratio = successes / total
+    denominator = 1 + z_score ** 2 / total
+    center = (ratio + z_score ** 2 / (2 * total)) / denominator
+    margin = z_score * math.sqrt(ratio * (1 - ratio) / total + z_score ** 2 / (4 * total ** 2)) / denominator
+    return [max(0.0, center - margin) * 100, min(1.0, center + margin) * 100]
+
+
+def _count_rows(value):
+    """
+    Number of result rows of a dashboard section: the length of a list, or of
+    the lists held by a dict (1 for a dict of plain counters).
+    """
+    if value is None:
+        return 0
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        lists = [item for item in value.values() if isinstance(item, list)]
+        return sum(len(item) for item in lists) if lists else 1
+    return 1
+
 
 class MarketingDashboardHandler(models.TransientModel):
     _name = 'marketing.dashboard.handler'
     _description = 'Marketing Dashboard Handler'
 
+    def init(self):
+        super().init()
+        self.env.cr.execute(SQL("CREATE SEQUENCE IF NOT EXISTS %s", SQL.identifier(CACHE_GENERATION_SEQUENCE)))
+
     @api.model
-    def get_dashboard_data(self, campaign_id=None, mailing_id=None):
+    def get_dashboard_data(self, campaign_id=None, mailing_id=None, date_from=None, date_to=None):
         """
         Main method to fetch all dashboard data.
+        Results are cached per company, filters and user access scope.
+        date_from / date_to are optional inclusive days (YYYY-MM-DD) in the user timezone.
+        In debug mode, the timings of every section are returned under '_perf'.
+        Unfiltered and campaign level views are served from a background snapshot
+        (see marketing.dashboard.snapshot): its age is returned under '_snapshot'
+        and a stale snapshot is recomputed by the cron.
+        """
+        snapshot = self._get_snapshot(campaign_id, mailing_id, date_from, date_to)
+        if snapshot:
+            if not snapshot.payload:
+                # First visit of this view: compute it now, the cron keeps it fresh afterwards
+                snapshot._compute_payload()
+            data = self._strip_perf(dict(snapshot.payload))
+            snapshot._touch()
+            data['_snapshot'] = snapshot._get_info()
+            return data
+        return self._strip_perf(self._get_cached_data(campaign_id, mailing_id, DASHBOARD_PANELS, date_from, date_to))
+
+    @api.model
+    def get_dashboard_snapshot(self, campaign_id=None, date_from=None, date_to=None):
+        """
+        Return {'data': payload, 'snapshot': metadata} of the snapshot of an
+        unfiltered or campaign level view without ever computing it: a missing
+        or stale snapshot is handed to the cron and the client polls this method
+        until fresh figures are available. 'data' is None when there is no
+        snapshot yet, 'snapshot' is None when snapshots are disabled.
+        """
+        snapshot = self._get_snapshot(campaign_id, None, date_from, date_to)
+        if not snapshot:
+            return {'data': None, 'snapshot': None}
+        snapshot._touch()
+        return {
+            'data': self._strip_perf(dict(snapshot.payload)) if snapshot.payload else None,
+            'snapshot': snapshot._get_info(),
+        }
+
+    @api.model
+    def _get_snapshot(self, campaign_id=None, mailing_id=None, date_from=None, date_to=None):
+        """
+        Return the (sudo) snapshot of the view, created empty when missing, or
+        None when snapshots are disabled or the view is filtered on a mailing.
+        Snapshots are shared by the users of the same access scope, like the cache.
+        """
+        if mailing_id or self._get_cache_param('snapshot_max_age', DEFAULT_SNAPSHOT_MAX_AGE) <= 0:
+            return None
+        Snapshot = self.env['marketing.dashboard.snapshot'].sudo()
+        key = Snapshot._get_key(self._get_cache_key(campaign_id, None, date_from, date_to))
+        snapshot = Snapshot.search([('key', '=', key)], limit=1)
+        if snapshot:
+            return snapshot
+
+        # Concurrent first visits of the same view must not fail on the unique key
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO marketing_dashboard_snapshot (key, user_id, company_id, create_uid, create_date, write_uid, write_date)
+            VALUES (%(key)s, %(uid)s, %(company_id)s, %(uid)s, %(now)s, %(uid)s, %(now)s)
+            ON CONFLICT (key) DO NOTHING
+            RETURNING id
+            """,
+            key=key,
+            uid=self.env.uid,
+            company_id=self.env.company.id,
+            now=self.env.cr.now(),
+        ))
+        row = self.env.cr.fetchone()
+        if not row:
+            return Snapshot.search([('key', '=', key)], limit=1)
+        snapshot = Snapshot.browse(row[0])
+        snapshot.write({
+            'allowed_company_ids': self.env.companies.ids,
+            'lang': self.env.lang,
+            'campaign_id': int(campaign_id) if campaign_id else False,
+            'date_from': date_from or False,
+            'date_to': date_to or False,
+            'last_access': fields.Datetime.now(),
+        })
+        return snapshot
+
+    @api.model
+    def _strip_perf(self, data):
+        """
+        Keep the '_perf' block of a payload in debug mode only.
+        """
+        perf = data.pop('_perf', None)
+        if self._is_debug_mode():
+            data['_perf'] = perf
+        return data
+
+    @api.model
+    def get_panel_data(self, panel, campaign_id=None, mailing_id=None, date_from=None, date_to=None, with_perf=False):
+        """
+        Fetch a single dashboard section, so the client can load every card
+        concurrently instead of waiting for the slowest one.
+        With with_perf, return {'data': section, '_perf': timings} instead; the
+        timings are only filled in debug mode.
+        """
+        data = self.get_panels_data([panel], campaign_id, mailing_id, date_from, date_to, with_perf=with_perf)
+        if not with_perf:
+            return data[panel]
+        return {'data': data[panel], '_perf': data['_perf']}
+
+    @api.model
+    def get_panels_data(self, panels, campaign_id=None, mailing_id=None, date_from=None, date_to=None, with_perf=False):
+        """
+        Fetch a group of dashboard sections as {panel: section}, computed
+        together so that they share their common steps (the sections of
+        TRACE_PANELS run a single trace aggregation).
+        With with_perf, the timings of the group are added under '_perf'; they
+        are only filled in debug mode.
+        """
+        unknown = set(panels) - set(DASHBOARD_PANELS)
+        if unknown:
+            raise ValueError(f"Unknown dashboard panel: {', '.join(sorted(unknown))}")
+        panels = tuple(panel for panel in DASHBOARD_PANELS if panel in panels)
+        data = self._get_cached_data(campaign_id, mailing_id, panels, date_from, date_to)
+        result = {panel: data[panel] for panel in panels}
+        if with_perf:
+            result['_perf'] = data.get('_perf') if self._is_debug_mode() else None
+        return result
+
+    @api.model
+    def get_metric_timeseries(self, metric, granularity='day', filters=None):
+        """
+        Return the evolution of a metric (opens, clicks, bounces or revenue) per
+        day, week or month for the dashboard filters (dict with campaign_id,
+        mailing_id, date_from and date_to).
+        Bucketing happens in the database; when the range would produce more than
+        MAX_TIMESERIES_POINTS buckets a coarser granularity is used instead.
+        """
+        if metric not in TIMESERIES_METRICS:
+            raise ValueError(f"Unknown time-series metric: {metric}")
+        if granularity not in TIMESERIES_GRANULARITIES:
+            raise ValueError(f"Unknown time-series granularity: {granularity}")
+        filters = filters or {}
+        args = (filters.get('campaign_id'), filters.get('mailing_id'), filters.get('date_from'), filters.get('date_to'))
+        return self._get_cached(
+            args, ('timeseries', metric, granularity),
+            lambda: self._compute_metric_timeseries(metric, granularity, *args),
+        )
+
+    @api.model
+    def _get_cached_data(self, campaign_id, mailing_id, panels, date_from=None, date_to=None):
+        return self._get_cached(
+            (campaign_id, mailing_id, date_from, date_to), panels,
+            lambda: self._compute_dashboard_data(campaign_id, mailing_id, panels, date_from, date_to),
+        )
+
+    @api.model
+    def _get_cached(self, filter_args, scope, compute):
+        """
+        Return compute() through the dashboard cache. filter_args are the
+        (campaign_id, mailing_id, date_from, date_to) filters and scope tells
+        apart the payloads computed for the same filters.
+        """
+        ttl = self._get_cache_param('cache_ttl', DEFAULT_CACHE_TTL)
+        if ttl <= 0:
+            return compute()
+
+        def compute_entry():
+            # Rows read on a lagging replica may predate the last invalidation
+            # of the cache (the write is committed, the replica has not replayed
+            # it yet): such an entry is kept no longer than the lag
+            with track_lag() as tracked:
+                data = compute()
+            return data, math.ceil(tracked['lag']) or None
+
+        cache = get_dashboard_cache(self.env.cr.dbname)
+        key = self._get_cache_key(*filter_args) + (scope, self._get_cache_generation())
+        data, max_age = cache.get_or_compute(key, ttl, compute_entry, self._get_cache_param('cache_size', DEFAULT_CACHE_SIZE))
+        if max_age:
+            # Payloads built on top of this entry (e.g. a panel on the shared
+            # trace stats) inherit its shorter lifetime
+            report_lag(max_age)
+        return data
+
+    @api.model
+    def _build_mailing_domain(self, campaign_id=None, mailing_id=None):
+        """
+        Translate the campaign / mailing filters into a mailing.mailing domain.
         """
         domain = []
         
@@ -23,17 +409,429 @@ class MarketingDashboardHandler(models.TransientModel):
         if mailing_id:
             domain.append(('id', '=', int(mailing_id)))
 
-        return {
-            'deliverability': self.get_deliverability_metrics(domain),
-            'engagement': self.get_engagement_metrics(domain),
-            'conversion': self.get_conversion_metrics(domain),
-            'list_health': self.get_list_health_metrics(), # List health is global
-            'campaign_stages': self.get_campaign_stages(campaign_id),
-            'top_links': self.get_top_links(domain),
-            'top_campaigns': self.get_top_campaigns(domain),
-            'top_mailings': self.get_top_mailings(domain),
-            'ab_testing': self.get_ab_testing_metrics(domain),
+        return domain
+
+    @api.model
+    def _compute_dashboard_data(self, campaign_id=None, mailing_id=None, panels=DASHBOARD_PANELS, date_from=None, date_to=None):
+        """
+        Compute the requested dashboard sections, bypassing the cache.
+        """
+        domain = self._build_mailing_domain(campaign_id, mailing_id)
+        cr = self.env.cr
+        sections = {}
+
+        def measure(name, compute):
+            # Wall time, SQL queries and result rows of each step
+            queries = cr.sql_log_count
+            start = perf_counter()
+            result = compute()
+            sections[name] = {
+                'duration_ms': round((perf_counter() - start) * 1000, 2),
+                'queries': cr.sql_log_count - queries,
+                'rows': _count_rows(result),
+            }
+            return result
+
+        panels = set(panels)
+        filter_args = (campaign_id, mailing_id, date_from, date_to)
+        # Resolve the mailing filter once and share it with every section, and
+        # with the other panel groups of the same filters through the cache
+        filters = None
+        if panels - GLOBAL_PANELS:
+            filters = measure('_filters', lambda: self._get_cached(
+                filter_args, '_filters', lambda: self._resolve_filters(domain, date_from, date_to),
+            ))
+        # Read counters from the daily rollup instead of raw rows when enabled
+        use_rollup = self._use_rollup(windowed=bool(date_from or date_to))
+        # Deliverability, Engagement and Conversion share the same single-pass trace aggregation
+        trace_stats = None
+        if panels & TRACE_PANELS:
+            trace_stats = measure('_trace_stats', lambda: self._get_cached(
+                filter_args, ('_trace_stats', use_rollup),
+                lambda: self._get_trace_stats(filters, use_rollup=use_rollup),
+            ))
+
+        builders = {
+            'deliverability': lambda: self.get_deliverability_metrics(domain, trace_stats=trace_stats, filters=filters),
+            'engagement': lambda: self.get_engagement_metrics(domain, trace_stats=trace_stats, filters=filters),
+            'conversion': lambda: self.get_conversion_metrics(domain, filters=filters, use_rollup=use_rollup, trace_stats=trace_stats),
+            'list_health': lambda: self.get_list_health_metrics(), # List health is global
+            'campaign_stages': lambda: self.get_campaign_stages(campaign_id),
+            'top_links': lambda: self.get_top_links(domain, filters=filters),
+            'top_campaigns': lambda: self.get_top_campaigns(domain, filters=filters),
+            'top_mailings': lambda: self.get_top_mailings(domain, filters=filters),
+            'ab_testing': lambda: self.get_ab_testing_metrics(domain, filters=filters),
         }
+        data = {panel: measure(panel, builders[panel]) for panel in DASHBOARD_PANELS if panel in panels}
+
+        self._log_slow_sections(sections, campaign_id, mailing_id, date_from, date_to)
+        data['_perf'] = {
+            'computed_at': fields.Datetime.to_string(fields.Datetime.now()),
+            'use_rollup': use_rollup,
+            'duration_ms': round(sum(section['duration_ms'] for section in sections.values()), 2),
+            'queries': sum(section['queries'] for section in sections.values()),
+            'sections': sections,
+        }
+        return data
+
+    @api.model
+    def _log_slow_sections(self, sections, campaign_id=None, mailing_id=None, date_from=None, date_to=None):
+        """
+        Log one key=value line per section slower than the
+        dashboard_metricas_mail.slow_section_ms threshold, for log based alerting.
+        """
+        threshold = self._get_cache_param('slow_section_ms', DEFAULT_SLOW_SECTION_MS)
+        if threshold <= 0:
+            return
+        for name, section in sections.items():
+            if section['duration_ms'] < threshold:
+                continue
+            _logger.warning(
+                "dashboard_slow_section section=%s duration_ms=%.2f queries=%d rows=%d threshold_ms=%d "
+                "db=%s uid=%d company_id=%d campaign_id=%s mailing_id=%s date_from=%s date_to=%s",
+                name, section['duration_ms'], section['queries'], section['rows'], threshold,
+                self.env.cr.dbname, self.env.uid, self.env.company.id,
+                campaign_id or '-', mailing_id or '-', date_from or '-', date_to or '-',
+            )
+
+    @api.model
+    def _is_debug_mode(self):
+        return bool(request and request.session.debug)
+
+    @api.model
+    def _compute_metric_timeseries(self, metric, granularity, campaign_id=None, mailing_id=None, date_from=None, date_to=None):
+        filters = self._resolve_filters(self._build_mailing_domain(campaign_id, mailing_id), date_from, date_to)
+        result = {
+            'metric': metric,
+            'requested_granularity': granularity,
+            'granularity': granularity,
+            'points': [],
+        }
+        if filters.is_empty:
+            return result
+
+        # Model, datetime field used for bucketing and domain of each metric
+        if metric == 'revenue':
+            model = self.env['marketing.dashboard.attribution'].sudo()
+            date_field = 'date_order'
+            domain = self._get_attribution_domain(filters) + [
+                ('state', 'in', ['sale', 'done']),
+                ('invoice_status', '=', 'invoiced'),
+            ]
+        else:
+            model = self.env['mailing.trace']
+            status_field = 'trace_status' if 'trace_status' in model._fields else 'state'
+            date_field, metric_domain = {
+                'opens': ('open_datetime', [('open_datetime', '!=', False)]),
+                'clicks': ('links_click_datetime', [('links_click_datetime', '!=', False)]),
+                'bounces': ('create_date', [(status_field, '=', 'bounce')]),
+            }[metric]
+            domain = ([('mass_mailing_id', 'in', filters.mailing_ids)] if filters.is_filtered else []) + metric_domain
+            domain += filters.date_domain(date_field)
+
+        # Downsample: pick the finest granularity keeping the range under the limit
+        first_day = filters.date_from
+        if not first_day:
+            [(first_value,)] = model._read_group(domain, [], [f'{date_field}:min'])
+            if not first_value:
+                return result
+            first_day = first_value.date() if isinstance(first_value, datetime) else first_value
+        last_day = filters.date_to or fields.Date.context_today(self)
+        granularity = self._get_timeseries_granularity(granularity, first_day, last_day)
+        result['granularity'] = granularity
+
+        groupby = f'{date_field}:{granularity}'
+        values = {}
+        if metric == 'revenue':
+            # Convert each currency to the company currency, like the conversion metrics
+            groups = model._read_group(domain, [groupby, 'currency_id', 'company_id'], ['amount_total:sum'])
+            for bucket, currency, order_company, amount in groups:
+                bucket = bucket.date() if isinstance(bucket, datetime) else bucket
+                values[bucket] = values.get(bucket, 0.0) + self._convert_revenue(amount, currency, order_company)
+        else:
+            for bucket, count in model._read_group(domain, [groupby], ['__count']):
+                values[bucket.date() if isinstance(bucket, datetime) else bucket] = count
+
+        if not values:
+            return result
+
+        # Fill the empty buckets between the first and the last one with zeros
+        step = TIMESERIES_GRANULARITIES[granularity]
+        bucket = min(values)
+        end = max(max(values), last_day)
+        points = []
+        while bucket <= end:
+            points.append({'date': fields.Date.to_string(bucket), 'value': values.get(bucket, 0)})
+            bucket += step
+        result['points'] = points
+        return result
+
+    @api.model
+    def _get_timeseries_granularity(self, granularity, first_day, last_day):
+        """
+        Return the requested granularity, or the first coarser one producing at
+        most MAX_TIMESERIES_POINTS buckets between first_day and last_day.
+        """
+        names = list(TIMESERIES_GRANULARITIES)
+        for name in names[names.index(granularity):]:
+            buckets = 0
+            day = first_day
+            while day <= last_day and buckets <= MAX_TIMESERIES_POINTS:
+                day += TIMESERIES_GRANULARITIES[name]
+                buckets += 1
+            if buckets <= MAX_TIMESERIES_POINTS:
+                return name
+        return names[-1]
+
+    @api.model
+    def _get_cache_param(self, name, default):
+        value = self.env['ir.config_parameter'].sudo().get_param(f'dashboard_metricas_mail.{name}')
+        try:
+            return int(value) if value else default
+        except ValueError:
+            return default
+
+    @api.model
+    def _use_rollup(self, windowed=False):
+        """
+        Whether metrics are read from marketing.dashboard.daily.stat
+        (dashboard_metricas_mail.use_rollup system parameter).
+        Users restricted to their own orders always read the raw rows.
+        The rollup days are those of its own timezone: a date window (in the
+        user timezone, see _get_date_range) is only read from the rollup when
+        both timezones match, and from the raw rows otherwise.
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param('dashboard_metricas_mail.use_rollup')
+        if not (str2bool(value, default=False) if value else False):
+            return False
+        # The rollup sums the orders of every salesman
+        if self._has_restricted_order_access():
+            return False
+        return not windowed or self.env['marketing.dashboard.daily.stat']._get_rollup_tz() == (self.env.user.tz or 'UTC')
+
+    @api.model
+    def _use_approximate_mode(self):
+        """
+        Whether the trace counters may be estimated on very large tables
+        (dashboard_metricas_mail.approximate_mode system parameter).
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param('dashboard_metricas_mail.approximate_mode')
+        return str2bool(value, default=False) if value else False
+
+    @api.model
+    def _get_sample_percent(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('dashboard_metricas_mail.sample_percent')
+        try:
+            return float(value) if value else DEFAULT_SAMPLE_PERCENT
+        except ValueError:
+            return DEFAULT_SAMPLE_PERCENT
+
+    @api.model
+    def _get_cache_key(self, campaign_id, mailing_id, date_from=None, date_to=None):
+        """
+        Build the cache key: company, filters (with the timezone of their date
+        window) and the access scope of the user.
+        Users sharing the same groups see the same figures, except restricted
+        salesmen whose record rules limit the orders to their own.
+        """
+        user = self.env.user
+        scope = tuple(sorted(user.groups_id.ids))
+        if self._has_restricted_order_access():
+            scope += (('uid', user.id),)
+        return (
+            self.env.company.id,
+            tuple(sorted(self.env.companies.ids)),
+            int(campaign_id) if campaign_id else False,
+            int(mailing_id) if mailing_id else False,
+            date_from or False,
+            date_to or False,
+            # Date windows are days of the user timezone
+            (self.env.user.tz or 'UTC') if date_from or date_to else False,
+            scope,
+            self.env.lang,
+        )
+
+    @api.model
+    def _has_restricted_order_access(self):
+        """
+        Whether the record rules of the user limit the orders to their own.
+        """
+        return not self.env.user.has_group('sales_team.group_sale_salesman_all_leads')
+
+    @api.model
+    def _get_cache_generation(self):
+        """
+        Current generation of the dashboard caches, shared by all the workers.
+        """
+        self.env.cr.execute(SQL("SELECT last_value FROM %s", SQL.identifier(CACHE_GENERATION_SEQUENCE)))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _invalidate_dashboard_cache(self):
+        """
+        Drop the cached dashboards once the current transaction is committed,
+        so a concurrent request cannot cache the data being replaced: the
+        cache of this worker is cleared and the cache generation is bumped for
+        the other workers.
+        """
+        cr = self.env.cr
+        if not cr.postcommit.data.get('dashboard_metricas_mail.invalidate'):
+            cr.postcommit.data['dashboard_metricas_mail.invalidate'] = True
+            cr.postcommit.add(get_dashboard_cache(cr.dbname).clear)
+            cr.postcommit.add(self._bump_cache_generation)
+
+    @api.model
+    def _bump_cache_generation(self):
+        # Runs after the commit, so no worker can read the new generation and
+        # cache data that does not include the committed changes yet
+        with self.env.registry.cursor() as cr:
+            cr.execute(SQL("SELECT nextval(%s)", CACHE_GENERATION_SEQUENCE))
+
+    @api.model
+    def _queue_dashboard_deltas(self, after, before=None, links=None):
+        """
+        Accumulate counter deltas until the end of the transaction, then publish
+        them on the bus in one batch (see _send_dashboard_deltas).
+        after / before map (mailing_id, campaign_id, slice) to a Counter of the
+        trace counters after and before the change, links maps the same keys to
+        a Counter of clicks per link.tracker id. slice is the UTC start of the
+        creation time slice (see _get_delta_bucket).
+        """
+        cr = self.env.cr
+        pending = cr.precommit.data.get('dashboard_metricas_mail.deltas')
+        if pending is None:
+            pending = cr.precommit.data['dashboard_metricas_mail.deltas'] = defaultdict(
+                lambda: {'counters': Counter(), 'links': Counter()}
+            )
+            # Bus notifications are stored in the transaction and only reach the
+            # clients once it is committed, so a rollback never leaks a delta
+            cr.precommit.add(self._send_dashboard_deltas)
+        for key, counters in after.items():
+            pending[key]['counters'].update(counters)
+        for key, counters in (before or {}).items():
+            pending[key]['counters'].subtract(counters)
+        for key, counters in (links or {}).items():
+            pending[key]['links'].update(counters)
+
+    @api.model
+    def _send_dashboard_deltas(self):
+        """
+        Publish the deltas of the transaction: one message per channel (global
+        of the company, campaign and mailing), holding the counters per UTC
+        slice of trace creation time, which the clients map to their own days.
+        """
+        pending = self.env.cr.precommit.data.pop('dashboard_metricas_mail.deltas', None)
+        if not pending:
+            return
+        by_channel = defaultdict(lambda: defaultdict(lambda: {'counters': Counter(), 'links': Counter()}))
+        for (mailing_id, campaign_id, slice_start), delta in pending.items():
+            channels = [f'{BUS_GLOBAL_CHANNEL_PREFIX}{self.env.company.id}']
+            if mailing_id:
+                channels.append(f'{BUS_CHANNEL_PREFIX}mailing_{mailing_id}')
+            if campaign_id:
+                channels.append(f'{BUS_CHANNEL_PREFIX}campaign_{campaign_id}')
+            for channel in channels:
+                bucket = by_channel[channel][slice_start]
+                bucket['counters'].update(delta['counters'])
+                bucket['links'].update(delta['links'])
+
+        Bus = self.env['bus.bus'].sudo()
+        for channel, slices in by_channel.items():
+            deltas = []
+            for slice_start, bucket in slices.items():
+                counters = {name: value for name, value in bucket['counters'].items() if value}
+                links = {str(link_id): value for link_id, value in bucket['links'].items() if value}
+                if counters or links:
+                    deltas.append({'datetime': slice_start, 'counters': counters, 'links': links})
+            if deltas:
+                Bus._sendone(channel, BUS_DELTA_TYPE, {'channel': channel, 'deltas': deltas})
+
+    @api.model
+    def _get_delta_bucket(self, moment):
+        """
+        UTC slice (start, as a datetime string) of the bus deltas of a record
+        created at ``moment`` (now when not created yet).
+        """
+        moment = moment or fields.Datetime.now()
+        moment = moment.replace(
+            minute=moment.minute - moment.minute % BUS_DELTA_BUCKET_MINUTES, second=0, microsecond=0,
+        )
+        return fields.Datetime.to_string(moment)
+
+    @api.model
+    def _get_allowed_bus_channels(self, channels):
+        """
+        Keep the dashboard bus channels the current user may listen to: mass
+        mailing users only, and only the companies, campaigns and mailings
+        they can read.
+        """
+        if not self.env.user.has_group('mass_mailing.group_mass_mailing_user'):
+            return []
+        requested = {'campaign': set(), 'mailing': set()}
+        allowed = []
+        # The websocket has no company context, env.companies would only be the
+        # default company of the user
+        company_ids = self.env.user.company_ids.ids
+        for channel in channels:
+            if channel.startswith(BUS_GLOBAL_CHANNEL_PREFIX):
+                company_id = channel[len(BUS_GLOBAL_CHANNEL_PREFIX):]
+                if company_id.isdigit() and int(company_id) in company_ids:
+                    allowed.append(channel)
+                continue
+            kind, _sep, record_id = channel[len(BUS_CHANNEL_PREFIX):].partition('_')
+            if kind in requested and record_id.isdigit():
+                requested[kind].add(int(record_id))
+        if requested['campaign']:
+            campaigns = self.env['utm.campaign'].search([('id', 'in', list(requested['campaign']))])
+            allowed += [f'{BUS_CHANNEL_PREFIX}campaign_{campaign_id}' for campaign_id in campaigns.ids]
+        if requested['mailing']:
+            mailings = self.env['mailing.mailing'].search([('id', 'in', list(requested['mailing']))])
+            allowed += [f'{BUS_CHANNEL_PREFIX}mailing_{mailing_id}' for mailing_id in mailings.ids]
+        return allowed
+
+    @api.model
+    def get_cache_stats(self):
+        """
+        Hit/miss counters of the dashboard cache of the current worker (admins
+        only), with the pid of that worker: each worker has its own cache.
+        """
+        if not self.env.user._is_system():
+            raise AccessError(_("Only administrators can read the dashboard cache statistics."))
+        return dict(get_dashboard_cache(self.env.cr.dbname).stats(), pid=os.getpid())
+
+    @api.model
+    def _get_date_range(self, date_from=None, date_to=None):
+        """
+        Convert inclusive days (YYYY-MM-DD, user timezone) into the date window
+        (first day, last day, UTC start, UTC exclusive end). Missing bounds are None.
+        """
+        tz = pytz.timezone(self.env.user.tz or 'UTC')
+
+        def to_utc(day):
+            return tz.localize(datetime.combine(day, time.min)).astimezone(pytz.utc).replace(tzinfo=None)
+
+        first_day = fields.Date.to_date(date_from) if date_from else None
+        last_day = fields.Date.to_date(date_to) if date_to else None
+        return (
+            first_day,
+            last_day,
+            to_utc(first_day) if first_day else None,
+            to_utc(last_day + timedelta(days=1)) if last_day else None,
+        )
+
+    @api.model
+    def _resolve_filters(self, domain, date_from=None, date_to=None):
+        """
+        Search the mailings matching a mailing.mailing domain. Without filter
+        every section reads all the mailings and no search is needed.
+        The date window does not restrict the mailings themselves: a mailing sent
+        before the window can still collect clicks and orders within it.
+        """
+        return DashboardFilters(
+            domain=domain,
+            mailing_ids=self.env['mailing.mailing'].search(domain).ids if domain else [],
+            date_range=self._get_date_range(date_from, date_to),
+        )
 
     # ... existing methods ...
 
@@ -54,338 +852,500 @@ class MarketingDashboardHandler(models.TransientModel):
         if campaign_id:
             campaign_domain.append(('id', '=', int(campaign_id)))
             
-        # Get stages
-        stages = self.env['utm.stage'].search_read([], ['id', 'name'], order='sequence')
-        
-        stage_data = []
-        for stage in stages:
-            # Count campaigns in this stage
-            # We filter by stage AND specific campaign (if selected)
-            count = self.env['utm.campaign'].search_count(campaign_domain + [('stage_id', '=', stage['id'])])
-            stage_data.append({
-                'id': stage['id'],
-                'name': stage['name'],
-                'count': count
-            })
-            
+        # Count the campaigns of every stage in a single grouped query
+        counts = {
+            stage.id: count
+            for stage, count in self.env['utm.campaign']._read_group(campaign_domain, ['stage_id'], ['__count'])
+        }
+        stages = self.env['utm.stage'].search_fetch([], ['name'], order='sequence')
+
         return {
-            'stages': stage_data,
-            'has_stages': True,
+            'stages': [{
+                'id': stage.id,
+                'name': stage.name,
+                'count': counts.get(stage.id, 0),
+            } for stage in stages],
             'has_stages': True,
         }
 
     @api.model
-    def get_top_links(self, domain):
+    def get_top_links(self, domain, filters=None):
         """
-        Get top 5 clicked links.
+        Get the most clicked links of the filtered mailings within the date
+        window (dashboard_metricas_mail.top_links_limit, 5 by default).
         """
-        # Ensure we have mailings context
-        mailings = self.env['mailing.mailing'].search(domain)
-        if not mailings:
-             return []
+        filters = filters or self._resolve_filters(domain)
+        limit = max(1, self._get_cache_param('top_links_limit', DEFAULT_TOP_LINKS_LIMIT))
+        return self._get_link_ranking(filters, limit)[0]
+
+    @api.model
+    def get_link_ranking(self, campaign_id=None, mailing_id=None, date_from=None, date_to=None,
+                         limit=DEFAULT_LINK_RANKING_LIMIT, offset=0):
+        """
+        One page of the "all links" view: every clicked link of the filtered
+        mailings within the date window, most clicked first, and the number
+        of clicked links.
+        """
+        limit = max(1, min(int(limit or DEFAULT_LINK_RANKING_LIMIT), MAX_LINK_RANKING_LIMIT))
+        offset = max(0, int(offset or 0))
+        domain = self._build_mailing_domain(campaign_id, mailing_id)
+        filters = self._resolve_filters(domain, date_from, date_to)
+        links, total = self._get_link_ranking(filters, limit, offset)
+        return {'links': links, 'total': total, 'limit': limit, 'offset': offset}
+
+    @api.model
+    def _get_link_ranking(self, filters, limit, offset=0):
+        """
+        Rank the links on the clicks of the filtered mailings with a single
+        grouped query, which also returns the number of clicked links.
+        Unique clicks count distinct traces, or distinct IPs for the clicks
+        without trace. Returns (links, number of clicked links).
+        """
+        if filters.is_empty:
+            return [], 0
+
+        Click = self.env['link.tracker.click']
+        mailing_domain = [('mass_mailing_id', 'in', filters.mailing_ids)] if filters.is_filtered \
+            else [('mass_mailing_id', '!=', False)]
+        click_domain = mailing_domain + filters.date_domain('create_date') + [('link_id', '!=', False)]
+        # Served by the (mass_mailing_id, create_date) index, see link.tracker.click init()
+        query = Click._search(click_domain)
+        link_column = SQL.identifier(query.table, 'link_id')
+        query.groupby = link_column
+        query.order = SQL("clicks DESC, %s", link_column)
+        query.limit = limit
+        query.offset = offset
+        rows = self._execute_aggregate(query.select(
+            link_column,
+            SQL("COUNT(*) AS clicks"),
+            SQL(
+                "COUNT(DISTINCT COALESCE('trace:' || %s, 'ip:' || %s)) AS unique_clicks",
+                SQL.identifier(query.table, 'mailing_trace_id'),
+                SQL.identifier(query.table, 'ip'),
+            ),
+            # Number of groups, computed before LIMIT / OFFSET apply
+            SQL("COUNT(*) OVER () AS link_count"),
+        ))
+        if not rows:
+            # The page may start after the last link, count them on their own
+            total = Click._read_group(click_domain, [], ['link_id:count_distinct'])[0][0] if offset else 0
+            return [], total
+
+        links = self.env['link.tracker'].browse([row[0] for row in rows])
+        links.fetch(['title', 'label', 'url'])
+        # short_url depends on 'code', which link.tracker computes with one search per link
+        short_urls = self._get_link_short_urls(links)
+        # Iterating keeps the whole recordset as prefetch set, browse() would not
+        link_by_id = {link.id: link for link in links}
 
-        # Filter clicks by these mailings
-        # 'link.tracker.click' has 'mass_mailing_id'
-        click_domain = [('mass_mailing_id', 'in', mailings.ids)]
-        
-        # Read Group to count clicks per link
-        # 'link_id' is the Many2one to link.tracker
-        groups = self.env['link.tracker.click'].read_group(
-            click_domain,
-            ['link_id'],
-            ['link_id'],
-            orderby='link_id_count desc',
-            limit=5
-        )
-        
         links_data = []
-        for g in groups:
-            if not g['link_id']:
-                continue
-                
-            # g['link_id'] is usually (id, name) tuple in read_group for m2o
-            link_id = g['link_id'][0]
-            link_name = g['link_id'][1] or "Unknown Link"
-            count = g['link_id_count']
-            
-            # Fetch full link object to get title and label
-            link = self.env['link.tracker'].browse(link_id)
+        for link_id, clicks, unique_clicks, _link_count in rows:
+            link = link_by_id[link_id]
             # Display both Title and Label if available
-            parts = []
-            if link.title:
-                parts.append(link.title)
-            if link.label:
-                parts.append(link.label)
-            
-            display_name = " - ".join(parts) if parts else link_name
-            
-            # Use the Global click count from the link object to match user expectation ("various")
-            # The 'count' from read_group is filtered by mailing, which might be why they see 1.
-            # Showing global popularity is often more useful for "Top Links".
-            total_clicks = link.count 
-            
+            parts = [part for part in (link.title, link.label) if part]
             links_data.append({
                 'id': link_id,
-                'name': display_name,
+                'name': " - ".join(parts) if parts else (link.url or _("Unknown Link")),
                 'url': link.url, # storing URL separately for the href
-                'short_url': link.short_url, # For the + stats redirection
-                'count': total_clicks
+                'short_url': short_urls.get(link_id), # For the + stats redirection
+                'count': clicks,
+                'unique_count': unique_clicks,
             })
-            
-        # Sort by total_clicks desc (since user wants to see them ordered by the number shown)
-        links_data.sort(key=lambda x: x['count'], reverse=True)
-            
-        return links_data
+        return links_data, rows[0][3]
 
     @api.model
-    def get_top_campaigns(self, domain):
+    def _get_link_short_urls(self, links):
         """
-        Get top 5 campaigns by Invoiced Revenue.
+        Build the short URL of several link.tracker records with a single query
+        on link.tracker.code (the most recent code of each link is used).
         """
-        # 1. Reuse logic to find relevant source_ids from the domain
-        # The domain comes for 'mailing.mailing'. 
-        mailings = self.env['mailing.mailing'].search(domain)
-        source_ids = mailings.mapped('source_id').ids
-        if not source_ids:
-             return []
+        codes = self.env['link.tracker.code'].search_fetch(
+            [('link_id', 'in', links.ids)], ['link_id', 'code'], order='id desc'
+        )
+        code_by_link = {}
+        for code in codes:
+            code_by_link.setdefault(code.link_id.id, code.code)
+        return {
+            link.id: link.short_url_host + code_by_link[link.id]
+            for link in links
+            if code_by_link.get(link.id)
+        }
 
-        # 2. Query sale.order to get revenue by campaign
-        # We need to group by campaign_id.
-        # Ensure we only count invoiced orders.
-        order_domain = [
-            ('invoice_status', '=', 'invoiced'),
-            ('source_id', 'in', source_ids),
-            ('campaign_id', '!=', False) 
-        ]
-        
-        groups = self.env['sale.order'].read_group(
-            order_domain,
-            ['campaign_id', 'amount_total'],
-            ['campaign_id'],
-            orderby='amount_total desc',
-            limit=5
+    @api.model
+    def get_top_campaigns(self, domain, filters=None):
+        """
+        Get top 5 campaigns by Invoiced Revenue, from the order attribution.
+        """
+        filters = filters or self._resolve_filters(domain)
+        if filters.is_empty:
+            return []
+        groups = self.env['marketing.dashboard.attribution'].sudo()._read_group(
+            self._get_attribution_domain(filters) + [('invoice_status', '=', 'invoiced'), ('campaign_id', '!=', False)],
+            ['campaign_id'], ['amount_total:sum'], order='amount_total:sum desc', limit=5,
         )
-        
-        data = []
-        for g in groups:
-            if not g['campaign_id']:
-                continue
-            data.append({
-                'id': g['campaign_id'][0],
-                'name': g['campaign_id'][1],
-                'total_revenue': g['amount_total']
-            })
-        return data
+        return [{
+            'id': campaign.id,
+            'name': campaign.name,
+            'total_revenue': revenue,
+        } for campaign, revenue in groups]
 
     @api.model
-    def get_top_mailings(self, domain):
+    def get_top_mailings(self, domain, filters=None):
         """
-        Get top 5 mailings by Invoiced Revenue.
+        Get top 5 mailings by Invoiced Revenue, from the order attribution.
         """
-        mailings = self.env['mailing.mailing'].search(domain)
-        source_ids = mailings.mapped('source_id').ids
-        if not source_ids:
-             return []
+        filters = filters or self._resolve_filters(domain)
+        if filters.is_empty:
+            return []
+        groups = self.env['marketing.dashboard.attribution'].sudo()._read_group(
+            self._get_attribution_domain(filters) + [('invoice_status', '=', 'invoiced')],
+            ['mailing_id'], ['amount_total:sum'], order='amount_total:sum desc', limit=5,
+        )
+        return [{
+            'id': mailing.id,
+            'name': mailing.subject,
+            'total_revenue': revenue,
+        } for mailing, revenue in groups]
 
-        # Group by source_id (which maps 1:1 to mailing usually)
-        order_domain = [
-            ('invoice_status', '=', 'invoiced'),
-            ('source_id', 'in', source_ids)
-        ]
-        
-        groups = self.env['sale.order'].read_group(
-            order_domain,
-            ['source_id', 'amount_total'],
-            ['source_id'],
-            orderby='amount_total desc',
-            limit=5
+    @api.model
+    def _get_attribution_domain(self, filters):
+        """
+        marketing.dashboard.attribution domain of the filtered mailings within
+        the date window, restricted to the orders the user can read.
+        The table exposes order amounts and is only readable by administrators:
+        the sections read it with sudo(), always behind this sale.order guard.
+        """
+        domain = [('mailing_id', 'in', filters.mailing_ids)] if filters.is_filtered else []
+        return domain + filters.date_domain('date_order') + [('order_id', 'in', self.env['sale.order']._search([]))]
+
+    @api.model
+    def get_filter_options(self, campaign_id=None, mailing_id=None, date_from=None, date_to=None):
+        """
+        Returns the first page of campaigns and mailings for filters.
+        Kept for compatibility, the dashboard uses search_filter_options.
+        """
+        campaigns = self.search_filter_options('campaign', selected_id=campaign_id)
+        mailings = self.search_filter_options(
+            'mailing', campaign_id=campaign_id, selected_id=mailing_id, date_from=date_from, date_to=date_to,
         )
-        
-        data = []
-        for g in groups:
-            if not g['source_id']:
-                continue
-            
-            source_id = g['source_id'][0]
-            revenue = g['amount_total']
-            
-            # Try to find the mailing subject for this source
-            # We search based on source_id because that's what we have from the Order
-            mailing = self.env['mailing.mailing'].search([('source_id', '=', source_id)], limit=1)
-            name = mailing.subject if mailing else g['source_id'][1]
-            mailing_id = mailing.id if mailing else False
-            
-            if mailing_id:
-                data.append({
-                    'id': mailing_id,
-                    'name': name,
-                    'total_revenue': revenue
-                })
-                
-        return data
+
+        # Ensure the selected mailing_id is in the list (if it exists)
+        mailing_options = mailings['records']
+        if mailings['selected'] and mailings['selected'] not in mailing_options:
+            mailing_options.append(mailings['selected'])
+
+        return {
+            'campaigns': campaigns['records'],
+            'mailings': mailing_options,
+        }
 
     @api.model
-    def get_filter_options(self, campaign_id=None, mailing_id=None):
+    def search_filter_options(self, kind, search='', limit=DEFAULT_FILTER_OPTIONS_LIMIT, offset=0,
+                              campaign_id=None, selected_id=None, date_from=None, date_to=None):
         """
-        Returns available campaigns and mailings for filters.
+        Typeahead search for the campaign ('campaign') and mailing ('mailing') filters.
+        Returns one page of {'id', 'name'} options whose name contains ``search``,
+        in a stable order, whether more options follow, and the currently
+        selected record (always returned, even when it is not in the page).
         """
+        if kind not in ('campaign', 'mailing'):
+            raise ValueError(f"Unknown filter option kind: {kind}")
+        limit = max(0, min(int(limit or 0), MAX_FILTER_OPTIONS_LIMIT))
+        offset = max(0, int(offset or 0))
+
         # Usage of sudo() to ensure users can see the options even if they have restrictive rules
         # (Dashboard usually implies read access to high level metrics)
-        
-        campaigns = []
-        # Prioritize utm.campaign as it's used by mass_mailing
-        if 'utm.campaign' in self.env:
-             campaigns = self.env['utm.campaign'].sudo().search_read([], ['id', 'name'])
-        elif 'marketing.campaign' in self.env:
-             campaigns = self.env['marketing.campaign'].sudo().search_read([], ['id', 'name'])
-
-        mailing_domain = [('state', 'in', ['done', 'sending'])]
-        
-        if campaign_id:
-            # Verify field exists before filtering
-            if 'campaign_id' in self.env['mailing.mailing']._fields:
-                try:
-                    mailing_domain.append(('campaign_id', '=', int(campaign_id)))
-                except (ValueError, TypeError):
-                    pass # Ignore invalid campaign_id
-        
-        # Fetch default recent mailings
-        mailings = self.env['mailing.mailing'].sudo().search_read(mailing_domain, ['id', 'subject', 'sent_date'], order='sent_date desc', limit=50)
-        
-        # Ensure the selected mailing_id is in the list (if it exists)
-        if mailing_id:
+        if kind == 'campaign':
+            # Prioritize utm.campaign as it's used by mass_mailing
+            if 'utm.campaign' in self.env:
+                Model = self.env['utm.campaign'].sudo()
+            elif 'marketing.campaign' in self.env:
+                Model = self.env['marketing.campaign'].sudo()
+            else:
+                return {'records': [], 'has_more': False, 'selected': False}
+            domain = [('name', 'ilike', search)] if search else []
+            field_names = ['id', 'name']
+            order = 'name, id'
+
+            def format_option(record):
+                return {'id': record['id'], 'name': record['name']}
+        else:
+            Model = self.env['mailing.mailing'].sudo()
+            domain = [('state', 'in', ['done', 'sending'])]
+            if campaign_id:
+                # Verify field exists before filtering
+                if 'campaign_id' in Model._fields:
+                    try:
+                        domain.append(('campaign_id', '=', int(campaign_id)))
+                    except (ValueError, TypeError):
+                        pass # Ignore invalid campaign_id
+
+            # Only propose mailings sent within the date window
+            _first_day, _last_day, start, end = self._get_date_range(date_from, date_to)
+            if start:
+                domain.append(('sent_date', '>=', start))
+            if end:
+                domain.append(('sent_date', '<', end))
+            if search:
+                domain.append(('subject', 'ilike', search))
+            field_names = ['id', 'subject', 'sent_date']
+            # Most recent mailings first, id keeps the order stable across pages
+            order = 'sent_date desc, id desc'
+
+            def format_option(record):
+                return {'id': record['id'], 'name': f"{record['subject']} ({record['sent_date'] or 'No Date'})"}
+
+        records = []
+        if limit:
+            # One extra record tells whether another page follows
+            records = Model.search_read(domain, field_names, order=order, limit=limit + 1, offset=offset)
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        selected = False
+        if selected_id:
             try:
-                m_id = int(mailing_id)
-                # Check if the selected mailing is already in the list
-                found = False
-                for m in mailings:
-                    if m['id'] == m_id:
-                        found = True
-                        break
-                
-                if not found:
-                     # Fetch specifically this one
-                     specific_mailing = self.env['mailing.mailing'].sudo().search_read([('id', '=', m_id)], ['id', 'subject', 'sent_date'], limit=1)
-                     if specific_mailing:
-                         mailings.extend(specific_mailing)
+                selected_id = int(selected_id)
             except (ValueError, TypeError):
-                pass
+                selected_id = False
+        if selected_id:
+            selected = next((record for record in records if record['id'] == selected_id), None)
+            if not selected:
+                # Fetch specifically this one
+                selected = next(iter(Model.search_read([('id', '=', selected_id)], field_names, limit=1)), False)
 
         return {
-            'campaigns': campaigns,
-            'mailings': [{'id': m['id'], 'name': f"{m['subject']} ({m['sent_date'] or 'No Date'})"} for m in mailings],
+            'records': [format_option(record) for record in records],
+            'has_more': has_more,
+            'selected': format_option(selected) if selected else False,
+        }
+
+    @api.model
+    def _get_trace_stats(self, filters, use_rollup=False):
+        """
+        Aggregate every mailing.trace counter used by the dashboard in a single SQL pass.
+        Returns a dict with total, sent, delivered, bounced, exception, opened, clicked
+        and replied counts, or None when the mailing filter matches no mailing.
+        With use_rollup, the counters are summed from the daily rollup instead.
+        In approximate mode, the counters are estimated when the exact aggregate
+        exceeds its time budget, see _get_approximate_trace_stats.
+        """
+        Trace = self.env['mailing.trace']
+
+        # No mailings match the filter
+        if filters.is_empty:
+            return None
+
+        if use_rollup:
+            # The rollup only holds traces linked to a mailing
+            return self.env['marketing.dashboard.daily.stat'].sudo()._get_totals(
+                filters.mailing_ids if filters.is_filtered else None, filters.date_from, filters.date_to,
+            )
+
+        # _search applies access rights and record rules, so the raw aggregate
+        # below sees exactly the same traces as the former search_count calls
+        query = Trace._search(filters.trace_domain())
+        if not self._use_approximate_mode():
+            return self._get_exact_trace_stats(query)
+
+        timeout = self._get_cache_param('exact_timeout_ms', DEFAULT_EXACT_TIMEOUT_MS)
+        if timeout <= 0:
+            return self._get_approximate_trace_stats(query, 'mode')
+        try:
+            return self._get_exact_trace_stats(query, timeout=timeout)
+        except QueryCanceled:
+            _logger.info("Dashboard trace aggregate exceeded %s ms, using the approximate figures", timeout)
+            return self._get_approximate_trace_stats(query, 'timeout')
+
+    @api.model
+    def _get_trace_columns(self, table):
+        """
+        Aggregates of _get_trace_stats over the traces of ``table`` (an alias),
+        in the order expected by _format_trace_stats.
+        """
+        status_field = 'trace_status' if 'trace_status' in self.env['mailing.trace']._fields else 'state'
+        status = SQL.identifier(table, status_field)
+        return [
+            SQL("COUNT(*)"),
+            SQL("COUNT(*) FILTER (WHERE %s IN %s)", status, SENT_STATUSES),
+            SQL("COUNT(*) FILTER (WHERE %s IN %s)", status, DELIVERED_STATUSES),
+            SQL("COUNT(*) FILTER (WHERE %s = 'bounce')", status),
+            SQL("COUNT(%s)", SQL.identifier(table, 'open_datetime')),
+            SQL("COUNT(%s)", SQL.identifier(table, 'links_click_datetime')),
+            SQL("COUNT(%s)", SQL.identifier(table, 'reply_datetime')),
+        ]
+
+    @api.model
+    def _format_trace_stats(self, total, sent, delivered, bounced, opened, clicked, replied):
+        return {
+            'total': total,
+            'sent': sent,
+            'delivered': delivered,
+            'bounced': bounced,
+            # EXCEPTION: All traces that are NOT in sent statuses
+            # This catches any error status regardless of name (error, exception, failure, cancel, etc.)
+            'exception': total - sent,
+            'opened': opened,
+            'clicked': clicked,
+            'replied': replied,
+        }
+
+    @api.model
+    def _get_exact_trace_stats(self, query, timeout=None):
+        """
+        Count every trace of ``query``. With a timeout (milliseconds), the
+        aggregate is cancelled past it and QueryCanceled is raised, leaving
+        the transaction usable.
+        """
+        [row] = self._execute_aggregate(query.select(*self._get_trace_columns(query.table)), timeout=timeout)
+        return self._format_trace_stats(*row)
+
+    @api.model
+    def _execute_aggregate(self, query, timeout=None):
+        """
+        Run a read-only aggregate query (an SQL object) and return its rows.
+        The query runs on the read replica when one is configured, reachable
+        and not lagging behind, on the transaction cursor otherwise.
+        With a timeout (milliseconds), QueryCanceled is raised past it and
+        the transaction remains usable.
+        """
+        replica = get_replica_pool(self.env.cr.dbname)
+        if replica:
+            rows = replica.execute(
+                query, self._get_cache_param('replica_max_lag', DEFAULT_REPLICA_MAX_LAG), timeout=timeout,
+            )
+            if rows is not None:
+                return rows
+
+        cr = self.env.cr
+        if not timeout:
+            cr.execute(query)
+            return cr.fetchall()
+
+        cr.execute("SELECT current_setting('statement_timeout')")
+        [previous_timeout] = cr.fetchone()
+        # Rolling back the savepoint also restores the previous timeout
+        with cr.savepoint(flush=False):
+            cr.execute(SQL("SELECT set_config('statement_timeout', %s, true)", f'{timeout}ms'))
+            cr.execute(query, log_exceptions=False)
+            rows = cr.fetchall()
+            cr.execute(SQL("SELECT set_config('statement_timeout', %s, true)", previous_timeout))
+        return rows
+
+    @api.model
+    def _get_approximate_trace_stats(self, query, reason):
+        """
+        Estimate the counters of ``query`` without reading the whole table: the
+        total is the planner row estimate, the other counters apply the
+        proportions measured on a TABLESAMPLE of the traces. The result holds an
+        'approximate' block with the sample and the Wilson bounds of every rate.
+        """
+        percent = min(100.0, max(0.0001, self._get_sample_percent()))
+
+        [[[plan]]] = self._execute_aggregate(SQL("EXPLAIN (FORMAT JSON) %s", query.select(SQL("1"))))
+        estimated_total = int(plan['Plan']['Plan Rows'])
+
+        # Shadow the trace table with a sample of its blocks (the body of a non
+        # recursive CTE still reads the table itself): the domain conditions and
+        # the joins added by record rules then only apply to the sampled traces
+        trace_table = SQL.identifier(self.env['mailing.trace']._table)
+        where = SQL("WHERE %s", query.where_clause) if query.where_clause else SQL()
+        [row] = self._execute_aggregate(SQL(
+            "WITH %s AS (SELECT * FROM %s TABLESAMPLE SYSTEM (%s)) SELECT %s FROM %s %s",
+            trace_table, trace_table, percent,
+            SQL(", ").join(self._get_trace_columns(query.table)), query.from_clause, where,
+        ))
+        sample = self._format_trace_stats(*row)
+        sample_size = sample['total']
+
+        def scale(value):
+            return round(estimated_total * value / sample_size) if sample_size else 0
+
+        stats = {name: scale(value) for name, value in sample.items()}
+        stats['total'] = estimated_total
+        stats['approximate'] = {
+            'reason': reason,
+            'sample_percent': percent,
+            'sample_size': sample_size,
+            'estimated_total': estimated_total,
+            'bounds': {
+                'sent_rate': _wilson_interval(sample['sent'], sample_size),
+                'delivery_rate': _wilson_interval(sample['delivered'], sample_size),
+                'bounce_rate': _wilson_interval(sample['bounced'], sample_size),
+                'exception_rate': _wilson_interval(sample['exception'], sample_size),
+                'open_rate': _wilson_interval(sample['opened'], sample['delivered']),
+                'click_rate': _wilson_interval(sample['clicked'], sample['delivered']),
+                'reply_rate': _wilson_interval(sample['replied'], sample['delivered']),
+                'ctor': _wilson_interval(sample['clicked'], sample['opened']),
+            },
         }
+        return stats
 
     @api.model
-    def get_deliverability_metrics(self, mailing_domain):
+    def get_deliverability_metrics(self, mailing_domain, trace_stats=None, filters=None, use_rollup=False):
         """
         Calculate deliverability metrics directly from mailing.trace.
         Uses the same approach as the JavaScript frontend for consistency.
         """
-        Trace = self.env['mailing.trace']
-        
-        # Build trace domain based on mailing filters
-        trace_domain = []
-        
-        # If we have mailing filters, first get the mailing IDs
-        if mailing_domain:
-            mailings = self.env['mailing.mailing'].search(mailing_domain)
-            if mailings:
-                trace_domain.append(('mass_mailing_id', 'in', mailings.ids))
-            else:
-                # No mailings match the filter, return 0s
-                return {
-                    'sent': 0, 'delivered': 0, 'bounced': 0, 'exception': 0,
-                    'delivery_rate': 0, 'bounce_rate': 0, 'exception_rate': 0, 'sent_rate': 0
-                }
-        
-        # Determine the status field (version dependent)
-        status_field = 'trace_status' if 'trace_status' in Trace._fields else 'state'
-        
-        # SENT: Traces that were successfully sent (not error/cancel/failure)
-        # Success statuses: sent, open, reply, click, bounce, delivered
-        sent_statuses = ['sent', 'open', 'reply', 'click', 'bounce', 'delivered']
-        sent = Trace.search_count(trace_domain + [(status_field, 'in', sent_statuses)]) if trace_domain else Trace.search_count([(status_field, 'in', sent_statuses)])
-        
-        # DELIVERED: Traces that reached recipient (excludes bounce)
-        delivered_statuses = ['sent', 'open', 'reply', 'click', 'delivered']
-        delivered = Trace.search_count(trace_domain + [(status_field, 'in', delivered_statuses)]) if trace_domain else Trace.search_count([(status_field, 'in', delivered_statuses)])
-        
-        # BOUNCED: Traces that bounced
-        bounced = Trace.search_count(trace_domain + [(status_field, '=', 'bounce')]) if trace_domain else Trace.search_count([(status_field, '=', 'bounce')])
-        
-        # EXCEPTION: All traces that are NOT in sent statuses
-        # This catches any error status regardless of name (error, exception, failure, cancel, etc.)
-        exception = Trace.search_count(trace_domain + [(status_field, 'not in', sent_statuses)]) if trace_domain else Trace.search_count([(status_field, 'not in', sent_statuses)])
-        
+        if trace_stats is None:
+            trace_stats = self._get_trace_stats(filters or self._resolve_filters(mailing_domain), use_rollup=use_rollup)
+
+        if trace_stats is None:
+            # No mailings match the filter, return 0s
+            return {
+                'sent': 0, 'delivered': 0, 'bounced': 0, 'exception': 0,
+                'delivery_rate': 0, 'bounce_rate': 0, 'exception_rate': 0, 'sent_rate': 0
+            }
+
+        sent = trace_stats['sent']
+        delivered = trace_stats['delivered']
+        bounced = trace_stats['bounced']
+        exception = trace_stats['exception']
+
         # Calculate rates based on total traces (sent + exception = total attempts)
         total_attempts = sent + exception
-        
+
         return {
             'sent': sent,
             'delivered': delivered,
             'bounced': bounced,
             'exception': exception,
-            'total': Trace.search_count(trace_domain) if trace_domain else Trace.search_count([]),
+            'total': trace_stats['total'],
             'delivery_rate': (delivered / total_attempts * 100) if total_attempts else 0,
             'bounce_rate': (bounced / total_attempts * 100) if total_attempts else 0,
             'exception_rate': (exception / total_attempts * 100) if total_attempts else 0,
             'sent_rate': (sent / total_attempts * 100) if total_attempts else 0,
+            # Estimated figures (approximate mode), with the bounds of the rates
+            'approximate': trace_stats.get('approximate', False),
         }
 
     @api.model
-    def get_engagement_metrics(self, mailing_domain):
+    def get_engagement_metrics(self, mailing_domain, trace_stats=None, filters=None, use_rollup=False):
         """
         Calculate engagement metrics from mailing.trace using datetime fields.
         """
-        Trace = self.env['mailing.trace']
-        
-        # Build trace domain based on mailing filters
-        trace_domain = []
-        if mailing_domain:
-            mailings = self.env['mailing.mailing'].search(mailing_domain)
-            if mailings:
-                trace_domain = [('mass_mailing_id', 'in', mailings.ids)]
-            else:
-                 return {
-                    'open_rate': 0, 'click_rate': 0, 'reply_rate': 0, 'ctor': 0,
-                    'total_opens': 0, 'total_clicks': 0, 'total_replies': 0,
-                }
-        
-        # Determine the status field for delivered count
-        status_field = 'trace_status' if 'trace_status' in Trace._fields else 'state'
-        
+        if trace_stats is None:
+            trace_stats = self._get_trace_stats(filters or self._resolve_filters(mailing_domain), use_rollup=use_rollup)
+
+        if trace_stats is None:
+            return {
+                'open_rate': 0, 'click_rate': 0, 'reply_rate': 0, 'ctor': 0,
+                'total_opens': 0, 'total_clicks': 0, 'total_replies': 0,
+            }
+
         # Total delivered (base for rates) - all successful traces
-        delivered_statuses = ['sent', 'open', 'reply', 'click', 'delivered']
-        if trace_domain:
-            delivered = Trace.search_count(trace_domain + [(status_field, 'in', delivered_statuses)])
-        else:
-            delivered = Trace.search_count([(status_field, 'in', delivered_statuses)])
-        
-        # OPENED: Count traces where open_datetime IS NOT NULL
-        if trace_domain:
-            opened = Trace.search_count(trace_domain + [('open_datetime', '!=', False)])
-        else:
-            opened = Trace.search_count([('open_datetime', '!=', False)])
-        
-        # CLICKED: Count traces where links_click_datetime IS NOT NULL
-        if trace_domain:
-            clicked = Trace.search_count(trace_domain + [('links_click_datetime', '!=', False)])
-        else:
-            clicked = Trace.search_count([('links_click_datetime', '!=', False)])
-        
-        # REPLIED: Count traces where reply_datetime IS NOT NULL
-        if trace_domain:
-            replied = Trace.search_count(trace_domain + [('reply_datetime', '!=', False)])
-        else:
-            replied = Trace.search_count([('reply_datetime', '!=', False)])
-        
+        delivered = trace_stats['delivered']
+        # OPENED / CLICKED / REPLIED: traces where the matching datetime IS NOT NULL
+        opened = trace_stats['opened']
+        clicked = trace_stats['clicked']
+        replied = trace_stats['replied']
+
         # Calculate rates
         open_rate = (opened / delivered * 100) if delivered else 0
         click_rate = (clicked / delivered * 100) if delivered else 0
         reply_rate = (replied / delivered * 100) if delivered else 0
         ctor = (clicked / opened * 100) if opened else 0
-        
+
         return {
             'open_rate': open_rate,
             'click_rate': click_rate,
@@ -394,17 +1354,20 @@ class MarketingDashboardHandler(models.TransientModel):
             'total_opens': opened,
             'total_clicks': clicked,
             'total_replies': replied,
+            'approximate': trace_stats.get('approximate', False),
         }
 
     @api.model
-    def get_conversion_metrics(self, domain):
+    def get_conversion_metrics(self, domain, filters=None, use_rollup=False, trace_stats=None):
         """
-        Calculate detailed conversion metrics from linked sale.order records.
+        Calculate detailed conversion metrics from the orders attributed to the
+        filtered mailings (see marketing.dashboard.attribution).
+        With use_rollup, the figures are summed from the daily rollup instead.
         """
         # Ensure we are finding mailings first to establish context
-        mailings = self.env['mailing.mailing'].search(domain)
+        filters = filters or self._resolve_filters(domain)
         
-        if not mailings:
+        if filters.is_empty:
              return {
                 'potential_revenue': 0,
                 'potential_conversions': 0,
@@ -414,34 +1377,67 @@ class MarketingDashboardHandler(models.TransientModel):
                 'revenue_per_email': 0,
             }
 
-        # Build domain for sale.order
-        # We need to find orders linked to these mailings
-        # Since 'mass_mailing_id' is not available on sale.order, we use the UTM Source.
-        # Each mailing has a defined source_id that is passed to the order via tracking.
-        
-        sources = mailings.mapped('source_id')
-        sale_domain = [('source_id', 'in', sources.ids)] if sources else [('id', '=', 0)] # Fallback if no sources
-        
-        Orders = self.env['sale.order']
-        
-        # POTENTIAL: 
-        # 1. Draft/Sent Quotations (Presupuestos)
-        # 2. Confirmed Orders NOT fully invoiced (state='sale' AND invoice_status != 'invoiced')
-        # This captures all pipeline revenue: Quotes, "To Invoice", "Upselling", "Nothing to Invoice" (e.g. waiting for delivery)
-        potential_domain = sale_domain + ['|', '|', ('state', '=', 'draft'), ('state', '=', 'sent'), '&', ('state', '=', 'sale'), ('invoice_status', '!=', 'invoiced')]
-        potential_orders = Orders.search(potential_domain)
-        potential_revenue = sum(potential_orders.mapped('amount_total'))
-        potential_conversions = len(potential_orders)
-        
-        # CONSOLIDATED (Total): State in 'sale', 'done' AND invoice_status = 'invoiced'
-        # This ensures we only show fully invoiced revenue as requested
-        total_domain = sale_domain + [('state', 'in', ['sale', 'done']), ('invoice_status', '=', 'invoiced')]
-        total_orders = Orders.search(total_domain)
-        total_revenue = sum(total_orders.mapped('amount_total'))
-        total_conversions = len(total_orders)
-        
-        total_sent = sum(mailings.mapped('sent'))
-        
+        if use_rollup:
+            totals = self.env['marketing.dashboard.daily.stat'].sudo()._get_totals(
+                filters.mailing_ids if filters.is_filtered else None, filters.date_from, filters.date_to,
+            )
+            return self._format_conversion_metrics(
+                totals['potential_revenue'], totals['potential_count'],
+                totals['invoiced_revenue'], totals['invoiced_count'],
+                totals['sent'],
+            )
+
+        # Orders attributed to the filtered mailings (UTM source or customer click),
+        # bucketed in a single grouped query on the attribution table
+        potential_revenue = total_revenue = 0.0
+        potential_conversions = total_conversions = 0
+        groups = self.env['marketing.dashboard.attribution'].sudo()._read_group(
+            self._get_attribution_domain(filters),
+            ['state', 'invoice_status', 'currency_id', 'company_id'],
+            ['amount_total:sum', '__count'],
+        )
+        for state, invoice_status, currency, order_company, amount, count in groups:
+            amount = self._convert_revenue(amount, currency, order_company)
+            # CONSOLIDATED (Total): State in 'sale', 'done' AND invoice_status = 'invoiced'
+            # This ensures we only show fully invoiced revenue as requested
+            if state in ('sale', 'done') and invoice_status == 'invoiced':
+                total_revenue += amount
+                total_conversions += count
+            # POTENTIAL:
+            # 1. Draft/Sent Quotations (Presupuestos)
+            # 2. Confirmed Orders NOT fully invoiced (state='sale' AND invoice_status != 'invoiced')
+            # This captures all pipeline revenue: Quotes, "To Invoice", "Upselling", "Nothing to Invoice" (e.g. waiting for delivery)
+            elif state in ('draft', 'sent') or (state == 'sale' and invoice_status != 'invoiced'):
+                potential_revenue += amount
+                potential_conversions += count
+
+        # Emails sent by the filtered mailings, from the trace aggregation
+        # instead of summing the computed 'sent' field of every mailing
+        if trace_stats is None:
+            trace_stats = self._get_trace_stats(filters)
+        total_sent = trace_stats['sent'] if trace_stats else 0
+
+        result = self._format_conversion_metrics(
+            potential_revenue, potential_conversions, total_revenue, total_conversions, total_sent,
+        )
+        # The rates are based on an estimated number of sent emails
+        result['approximate'] = bool(trace_stats and trace_stats.get('approximate'))
+        return result
+
+    @api.model
+    def _convert_revenue(self, amount, currency, order_company):
+        """
+        Convert an amount of orders in ``currency`` to the currency of the
+        current company at today's rate. Every revenue figure, live or read
+        from the daily rollup, goes through this single conversion rule.
+        """
+        company = self.env.company
+        if amount and currency and currency != company.currency_id:
+            amount = currency._convert(amount, company.currency_id, order_company or company, fields.Date.context_today(self))
+        return amount or 0.0
+
+    @api.model
+    def _format_conversion_metrics(self, potential_revenue, potential_conversions, total_revenue, total_conversions, total_sent):
         return {
             'potential_revenue': potential_revenue,
             'potential_conversions': potential_conversions,
@@ -452,35 +1448,301 @@ class MarketingDashboardHandler(models.TransientModel):
         }
 
     @api.model
-    def get_list_health_metrics(self):
-        # List health is usually global
-        contacts = self.env['mailing.contact']
-        total_contacts = contacts.search_count([])
-        blacklisted = contacts.search_count([('is_blacklisted', '=', True)])
-        
-        active = total_contacts - blacklisted
-        
-        last_30_days = fields.Datetime.now() - timedelta(days=30)
-        new_contacts = contacts.search_count([('create_date', '>=', last_30_days)])
-        
+    def get_list_health_metrics(self, list_id=None):
+        """
+        Contact health, globally or for the subscribers of a single mailing list,
+        plus the breakdown of every mailing list (see _get_list_breakdown).
+        """
+        lists = self._get_list_breakdown()
+
+        if list_id:
+            # Figures of the subscriptions of the list (opted-out subscribers are not active)
+            list_id = int(list_id)
+            row = next((line for line in lists if line['id'] == list_id), None)
+            if row is None:
+                row = dict.fromkeys(('total', 'active', 'blacklisted', 'opted_out', 'new_30d'), 0)
+            total_contacts, active, blacklisted, new_contacts = (
+                row['total'], row['active'], row['blacklisted'], row['new_30d'],
+            )
+        else:
+            # Contact counts and blacklist matches in a single pass; _search applies
+            # the access rules of mailing.contact like the former search_count calls
+            query = self.env['mailing.contact']._search([])
+            contact = query.table
+            since = fields.Datetime.now() - timedelta(days=30)
+            [(total_contacts, blacklisted, new_contacts)] = self._execute_aggregate(query.select(
+                SQL("COUNT(*)"),
+                SQL(
+                    """COUNT(*) FILTER (WHERE EXISTS (
+                        SELECT 1 FROM mail_blacklist bl
+                         WHERE bl.email = %s AND bl.active
+                    ))""",
+                    SQL.identifier(contact, 'email_normalized'),
+                ),
+                SQL("COUNT(*) FILTER (WHERE %s >= %s)", SQL.identifier(contact, 'create_date'), since),
+            ))
+            active = total_contacts - blacklisted
+
         return {
+            'list_id': list_id or False,
             'total_contacts': total_contacts,
             'active_contacts': active,
             'blacklisted': blacklisted,
             'new_contacts_30d': new_contacts,
             'inactive_ratio': (blacklisted / total_contacts * 100) if total_contacts else 0,
+            'lists': lists,
         }
 
+    @api.model
+    def _get_list_breakdown(self):
+        """
+        Subscription health of every mailing list in a single query: total,
+        active (neither opted-out nor blacklisted), blacklisted, opted-out and
+        subscribed in the last 30 days. Largest lists first.
+        """
+        query = self.env['mailing.list']._search([])
+        rows = self._execute_aggregate(SQL(
+            """
+            SELECT list.id,
+                   list.name,
+                   COUNT(sub.id) AS total,
+                   COUNT(sub.id) FILTER (WHERE NOT COALESCE(sub.opt_out, FALSE) AND bl.id IS NULL) AS active,
+                   COUNT(sub.id) FILTER (WHERE bl.id IS NOT NULL) AS blacklisted,
+                   COUNT(sub.id) FILTER (WHERE sub.opt_out) AS opted_out,
+                   COUNT(sub.id) FILTER (WHERE sub.create_date >= %(since)s) AS new_30d
+              FROM mailing_list list
+         LEFT JOIN mailing_subscription sub ON sub.list_id = list.id
+         LEFT JOIN mailing_contact contact ON contact.id = sub.contact_id
+         LEFT JOIN mail_blacklist bl ON bl.email = contact.email_normalized AND bl.active
+             WHERE list.id IN (%(list_ids)s)
+          GROUP BY list.id, list.name
+          ORDER BY total DESC, list.id
+            """,
+            since=fields.Datetime.now() - timedelta(days=30),
+            list_ids=query.subselect(),
+        ))
+        return [{
+            'id': list_id,
+            'name': name,
+            'total': total,
+            'active': active,
+            'blacklisted': blacklisted,
+            'opted_out': opted_out,
+            'new_30d': new_30d,
+            'health': (active / total * 100) if total else 0,
+        } for list_id, name, total, active, blacklisted, opted_out, new_30d in rows]
+
 
 
     @api.model
-    def get_ab_testing_metrics(self, domain):
-        # Filter for mailings that are part of AB test
-        if 'ab_testing_enabled' not in self.env['mailing.mailing']._fields:
-             return {'ab_test_count': 0}
+    def get_ab_testing_metrics(self, domain, filters=None):
+        """
+        A/B tests of the filtered mailings, grouped like mass_mailing does (the
+        A/B mailings of a same campaign), with per-variant figures, the winner
+        according to the winner selection mode and a significance estimate.
+        Traces and orders of every variant are aggregated with one grouped
+        query each, whatever the number of tests and variants.
+        """
+        Mailing = self.env['mailing.mailing']
+        if 'ab_testing_enabled' not in Mailing._fields:
+             return {'ab_test_count': 0, 'tests': []}
 
-        ab_mailings = self.env['mailing.mailing'].search(domain + [('ab_testing_enabled', '=', True)])
-        
+        filters = filters or self._resolve_filters(domain)
+        if filters.is_empty:
+            return {'ab_test_count': 0, 'tests': []}
+
+        field_names = ['subject', 'campaign_id']
+        if 'ab_testing_winner_selection' in Mailing._fields:
+            field_names.append('ab_testing_winner_selection')
+        mailings = Mailing.search_fetch(
+            filters.mailing_domain() + [('ab_testing_enabled', '=', True), ('campaign_id', '!=', False)],
+            field_names, order='id desc',
+        )
+        # Most recent test groups first
+        mailing_ids_by_campaign = defaultdict(list)
+        for mailing in mailings:
+            mailing_ids_by_campaign[mailing.campaign_id].append(mailing.id)
+        campaigns = list(mailing_ids_by_campaign)[:MAX_AB_TESTS]
+        variants = Mailing.browse([
+            mailing_id for campaign in campaigns for mailing_id in mailing_ids_by_campaign[campaign]
+        ])
+
+        stats = self._get_mailing_stats(variants, filters)
+        criteria = dict(Mailing._fields['ab_testing_winner_selection']._description_selection(self.env)) \
+            if 'ab_testing_winner_selection' in Mailing._fields else {}
+
+        tests = []
+        for campaign in campaigns:
+            test_mailings = Mailing.browse(sorted(mailing_ids_by_campaign[campaign]))
+            criterion = test_mailings[0].ab_testing_winner_selection if 'ab_testing_winner_selection' in field_names else False
+            if criterion not in AB_WINNER_CRITERIA:
+                criterion = DEFAULT_AB_WINNER_CRITERION
+            tests.append(self._format_ab_test(campaign, test_mailings, stats, criterion, criteria.get(criterion, criterion)))
+
+        return {
+            'ab_test_count': len(mailings),
+            'tests': tests,
+        }
+
+    @api.model
+    def _get_mailing_stats(self, mailings, filters):
+        """
+        Figures of every mailing within the date window, keyed by mailing id:
+        one grouped query on the traces (by mailing and status) and one on the
+        attributed orders (by mailing, state, invoice status, currency and company).
+        Used by the A/B tests and the export.
+        """
+        stats = {
+            mailing.id: dict.fromkeys((
+                'total', 'sent', 'delivered', 'bounced', 'opened', 'clicked', 'replied',
+                'quotations', 'invoiced_count', 'revenue',
+            ), 0)
+            for mailing in mailings
+        }
+        if not mailings:
+            return stats
+
+        Trace = self.env['mailing.trace']
+        status_field = 'trace_status' if 'trace_status' in Trace._fields else 'state'
+        trace_groups = Trace._read_group(
+            [('mass_mailing_id', 'in', mailings.ids)] + filters.date_domain('create_date'),
+            ['mass_mailing_id', status_field],
+            ['__count', 'open_datetime:count', 'links_click_datetime:count', 'reply_datetime:count'],
+        )
+        for mailing, status, count, opened, clicked, replied in trace_groups:
+            line = stats[mailing.id]
+            line['total'] += count
+            if status in SENT_STATUSES:
+                line['sent'] += count
+            if status in DELIVERED_STATUSES:
+                line['delivered'] += count
+            if status == 'bounce':
+                line['bounced'] += count
+            line['opened'] += opened
+            line['clicked'] += clicked
+            line['replied'] += replied
+
+        # Same sale.order guard as _get_attribution_domain for the sudo read
+        order_groups = self.env['marketing.dashboard.attribution'].sudo()._read_group(
+            [('mailing_id', 'in', mailings.ids)] + filters.date_domain('date_order')
+            + [('order_id', 'in', self.env['sale.order']._search([]))],
+            ['mailing_id', 'state', 'invoice_status', 'currency_id', 'company_id'],
+            ['amount_total:sum', '__count'],
+        )
+        for mailing, state, invoice_status, currency, order_company, amount, count in order_groups:
+            line = stats[mailing.id]
+            if state != 'cancel':
+                line['quotations'] += count
+            # Same definition of invoiced revenue as get_conversion_metrics
+            if state in ('sale', 'done') and invoice_status == 'invoiced':
+                line['revenue'] += self._convert_revenue(amount, currency, order_company)
+                line['invoiced_count'] += count
+        return stats
+
+    @api.model
+    def _format_ab_test(self, campaign, mailings, stats, criterion, criterion_label):
+        """
+        Build the panel data of one A/B test: its variants, the winner on the
+        criterion and the p-value of the winner against the runner-up (for the
+        sale criteria, on the share of delivered emails that led to an order).
+        """
+        metric, base = AB_WINNER_CRITERIA[criterion]
+
+        def score(line):
+            # Amount criteria rank on the amount, ratio criteria on the ratio
+            if criterion == 'sale_invoiced_amount':
+                return line['revenue']
+            if criterion == 'sale_quotation_count':
+                return line['quotations']
+            return line[metric] / line[base] if line[base] else 0
+
+        variants = []
+        for mailing in mailings:
+            line = stats[mailing.id]
+            delivered = line['delivered']
+            variants.append(dict(
+                line,
+                id=mailing.id,
+                name=mailing.subject,
+                open_rate=(line['opened'] / delivered * 100) if delivered else 0,
+                click_rate=(line['clicked'] / delivered * 100) if delivered else 0,
+                reply_rate=(line['replied'] / delivered * 100) if delivered else 0,
+            ))
+
+        ranked = sorted(variants, key=lambda variant: score(variant), reverse=True)
+        winner = ranked[0] if ranked and score(ranked[0]) > 0 else None
+        p_value = None
+        if winner and len(ranked) > 1:
+            runner_up = ranked[1]
+            p_value = _two_proportion_p_value(
+                min(winner[metric], winner[base]), winner[base],
+                min(runner_up[metric], runner_up[base]), runner_up[base],
+            )
         return {
-            'ab_test_count': len(ab_mailings),
+            'campaign_id': campaign.id,
+            'name': campaign.name,
+            'criterion': criterion,
+            'criterion_label': criterion_label,
+            'variants': variants,
+            'winner_id': winner['id'] if winner else False,
+            'p_value': p_value,
+            'confidence': (1 - p_value) * 100 if p_value is not None else None,
+            'significant': p_value is not None and p_value < AB_SIGNIFICANCE_LEVEL,
         }
+
+    @api.model
+    def _get_export_header(self):
+        """
+        Column titles of the per-mailing export, matching _iter_export_rows.
+        """
+        return [
+            _("Mailing ID"), _("Mailing"), _("Campaign"), _("Sent Date"),
+            _("Total"), _("Sent"), _("Delivered"), _("Bounced"), _("Exception"),
+            _("Opened"), _("Clicked"), _("Replied"),
+            _("Delivery Rate (%)"), _("Open Rate (%)"), _("Click Rate (%)"), _("Reply Rate (%)"),
+            _("Quotations"), _("Invoiced Orders"), _("Invoiced Revenue"),
+        ]
+
+    @api.model
+    def _iter_export_rows(self, campaign_id=None, mailing_id=None, date_from=None, date_to=None):
+        """
+        Yield one row per mailing matching the dashboard filters, with its
+        deliverability, engagement and revenue figures within the date window.
+        Mailings are read by batches of increasing id and the ORM cache is
+        cleared after each batch, so memory does not grow with the export size.
+        """
+        Mailing = self.env['mailing.mailing']
+        domain = self._build_mailing_domain(campaign_id, mailing_id)
+        filters = DashboardFilters(domain, [], self._get_date_range(date_from, date_to))
+        batch_size = max(1, self._get_cache_param('export_batch_size', DEFAULT_EXPORT_BATCH_SIZE))
+        field_names = ['subject', 'sent_date']
+        if 'campaign_id' in Mailing._fields:
+            field_names.append('campaign_id')
+
+        last_id = 0
+        while True:
+            mailings = Mailing.search_fetch(domain + [('id', '>', last_id)], field_names, order='id', limit=batch_size)
+            if not mailings:
+                return
+            stats = self._get_mailing_stats(mailings, filters)
+            for mailing in mailings:
+                line = stats[mailing.id]
+                sent, delivered = line['sent'], line['delivered']
+                exception = line['total'] - sent
+                # Same base as get_deliverability_metrics: every attempt (sent + exception)
+                total_attempts = sent + exception
+                yield [
+                    mailing.id,
+                    mailing.subject or '',
+                    (mailing.campaign_id.name or '') if 'campaign_id' in field_names else '',
+                    fields.Datetime.to_string(mailing.sent_date) if mailing.sent_date else '',
+                    line['total'], sent, delivered, line['bounced'], exception,
+                    line['opened'], line['clicked'], line['replied'],
+                    round(delivered / total_attempts * 100, 2) if total_attempts else 0,
+                    round(line['opened'] / delivered * 100, 2) if delivered else 0,
+                    round(line['clicked'] / delivered * 100, 2) if delivered else 0,
+                    round(line['replied'] / delivered * 100, 2) if delivered else 0,
+                    line['quotations'], line['invoiced_count'], round(line['revenue'], 2),
+                ]
+            last_id = mailings[-1].id
+            self.env.invalidate_all()
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+from datetime import timedelta
+from time import perf_counter
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Default maximum age (seconds) of a snapshot before it is recomputed, number of
+# days a snapshot nobody opens is kept, and snapshots recomputed per cron run.
+# Overridable with the dashboard_metricas_mail.snapshot_max_age / snapshot_keep_days /
+# snapshot_batch_size system parameters (a max age of 0 disables the snapshots)
+DEFAULT_SNAPSHOT_MAX_AGE = 600
+DEFAULT_SNAPSHOT_KEEP_DAYS = 7
+DEFAULT_SNAPSHOT_BATCH_SIZE = 20
+# last_access is only written when older than this, to keep reads cheap
+ACCESS_GRANULARITY = timedelta(hours=1)
+
+
+class MarketingDashboardSnapshot(models.Model):
+    _name = 'marketing.dashboard.snapshot'
+    _description = 'Marketing Dashboard Snapshot'
+    _order = 'last_access desc, id'
+
+    key = fields.Char(string='Key', required=True, index=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Computed As', required=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, ondelete='cascade', readonly=True)
+    allowed_company_ids = fields.Json(string='Allowed Companies', readonly=True)
+    lang = fields.Char(string='Language', readonly=True)
+    campaign_id = fields.Many2one('utm.campaign', string='Campaign', ondelete='cascade', readonly=True)
+    date_from = fields.Date(string='From', readonly=True)
+    date_to = fields.Date(string='To', readonly=True)
+
+    payload = fields.Json(string='Payload', readonly=True)
+    computed_at = fields.Datetime(string='Computed At', readonly=True)
+    duration_ms = fields.Float(string='Computation Time (ms)', readonly=True)
+    refresh_requested = fields.Boolean(string='Refresh Requested', readonly=True)
+    last_access = fields.Datetime(string='Last Access', index=True, readonly=True)
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'Only one snapshot is allowed per filter combination and access scope.'),
+    ]
+
+    @api.model
+    def _get_key(self, cache_key):
+        """
+        Stable key of a filter combination and access scope (see
+        marketing.dashboard.handler._get_cache_key).
+        """
+        return hashlib.sha1(repr(cache_key).encode()).hexdigest()
+
+    @api.model
+    def _get_param(self, name, default):
+        return self.env['marketing.dashboard.handler']._get_cache_param(name, default)
+
+    def _get_age(self):
+        self.ensure_one()
+        if not self.computed_at:
+            return None
+        return (fields.Datetime.now() - self.computed_at).total_seconds()
+
+    def _is_stale(self):
+        age = self._get_age()
+        return age is None or age > self._get_param('snapshot_max_age', DEFAULT_SNAPSHOT_MAX_AGE)
+
+    def _touch(self):
+        """
+        Record that the snapshot was read and ask the cron to recompute it when stale.
+        """
+        self.ensure_one()
+        now = fields.Datetime.now()
+        values = {}
+        if not self.last_access or now - self.last_access > ACCESS_GRANULARITY:
+            values['last_access'] = now
+        if self._is_stale() and not self.refresh_requested:
+            values['refresh_requested'] = True
+        if values:
+            self.write(values)
+        if values.get('refresh_requested'):
+            self.env.ref('dashboard_metricas_mail.ir_cron_refresh_snapshots')._trigger()
+
+    def _get_info(self):
+        """
+        Snapshot metadata returned with its payload.
+        """
+        self.ensure_one()
+        age = self._get_age()
+        return {
+            'id': self.id,
+            'computed_at': fields.Datetime.to_string(self.computed_at) if self.computed_at else False,
+            'age': round(age) if age is not None else None,
+            'stale': self._is_stale(),
+            'refreshing': self.refresh_requested,
+        }
+
+    def _compute_payload(self):
+        """
+        Recompute the dashboard of the snapshot as the user, companies and
+        language it was requested with, so record rules apply as in the browser.
+        """
+        self.ensure_one()
+        handler = self.env['marketing.dashboard.handler'].with_user(self.user_id).with_company(self.company_id)
+        handler = handler.with_context(
+            allowed_company_ids=self.allowed_company_ids or [self.company_id.id],
+            lang=self.lang or self.user_id.lang,
+        )
+        start = perf_counter()
+        payload = handler._compute_dashboard_data(
+            self.campaign_id.id or None, None,
+            date_from=fields.Date.to_string(self.date_from) if self.date_from else None,
+            date_to=fields.Date.to_string(self.date_to) if self.date_to else None,
+        )
+        self.write({
+            'payload': payload,
+            'computed_at': fields.Datetime.now(),
+            'duration_ms': round((perf_counter() - start) * 1000, 2),
+            'refresh_requested': False,
+        })
+
+    @api.model
+    def _cron_refresh(self):
+        """
+        Drop the snapshots nobody opened lately, then recompute the stale ones,
+        explicitly requested first and most recently opened next.
+        """
+        now = fields.Datetime.now()
+        keep_days = self._get_param('snapshot_keep_days', DEFAULT_SNAPSHOT_KEEP_DAYS)
+        self.search([('last_access', '<', now - timedelta(days=keep_days))]).unlink()
+
+        max_age = self._get_param('snapshot_max_age', DEFAULT_SNAPSHOT_MAX_AGE)
+        if max_age <= 0:
+            return
+        stale_domain = [
+            '|', '|',
+            ('refresh_requested', '=', True),
+            ('computed_at', '=', False),
+            ('computed_at', '<', now - timedelta(seconds=max_age)),
+        ]
+        batch_size = self._get_param('snapshot_batch_size', DEFAULT_SNAPSHOT_BATCH_SIZE)
+        snapshots = self.search(stale_domain, order='refresh_requested desc, last_access desc, id', limit=batch_size)
+        for snapshot in snapshots:
+            try:
+                with self.env.cr.savepoint():
+                    snapshot._compute_payload()
+            except Exception:
+                # The user may have lost access meanwhile, the next visit recreates it
+                _logger.exception("Could not refresh dashboard snapshot %s, removing it", snapshot.id)
+                snapshot.unlink()
+
+        remaining = self.search_count(stale_domain)
+        self.env['ir.cron']._notify_progress(done=len(snapshots), remaining=remaining)
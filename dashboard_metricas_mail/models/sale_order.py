@@ -0,0 +1,60 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from .marketing_dashboard_attribution import ORDER_FIELDS
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    # Mailing of the order in marketing.dashboard.attribution, searched by the
+    # conversion drill-down of the dashboard
+    dashboard_mailing_id = fields.Many2one(
+        'mailing.mailing', string='Attributed Mailing',
+        compute='_compute_dashboard_mailing_id', search='_search_dashboard_mailing_id',
+    )
+
+    def init(self):
+        super().init()
+        # Conversion metrics now read marketing.dashboard.attribution, the
+        # source index of utm.mixin covers the attribution refresh
+        self.env.cr.execute("DROP INDEX IF EXISTS sale_order_source_id_date_order_index")
+        # The incremental refreshes look for orders written since their high-water mark
+        create_index(self.env.cr, 'sale_order_write_date_index', self._table, ['write_date'])
+
+    def _compute_dashboard_mailing_id(self):
+        attributions = self.env['marketing.dashboard.attribution'].sudo().search_fetch(
+            [('order_id', 'in', self.ids)], ['order_id', 'mailing_id'],
+        )
+        mailing_by_order = {attribution.order_id.id: attribution.mailing_id.id for attribution in attributions}
+        for order in self:
+            order.dashboard_mailing_id = mailing_by_order.get(order.id, False)
+
+    def _search_dashboard_mailing_id(self, operator, value):
+        # The attribution table is only readable by administrators, the orders
+        # themselves keep the access rules of the user
+        Attribution = self.env['marketing.dashboard.attribution'].sudo()
+        if operator in ('=', '!=') and not value:
+            # Orders attributed to any mailing, or to none
+            return [('id', 'in' if operator == '!=' else 'not in', Attribution._search([]).subselect('order_id'))]
+        return [('id', 'in', Attribution._search([('mailing_id', operator, value)]).subselect('order_id'))]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['marketing.dashboard.attribution']._queue_orders(records)
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Confirmation or a new source / customer / date may change the attribution
+        if ORDER_FIELDS.intersection(vals):
+            self.env['marketing.dashboard.attribution']._queue_orders(self)
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['marketing.dashboard.handler']._invalidate_dashboard_cache()
+        return res
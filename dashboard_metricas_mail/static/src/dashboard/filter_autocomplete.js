@@ -0,0 +1,81 @@
+/** @odoo-module */
+
+import { _t } from "@web/core/l10n/translation";
+import { AutoComplete } from "@web/core/autocomplete/autocomplete";
+import { useService } from "@web/core/utils/hooks";
+import { Component } from "@odoo/owl";
+
+// Options fetched per request to search_filter_options
+const PAGE_SIZE = 20;
+
+/**
+ * Lazy-loading autocomplete for the dashboard filters.
+ * Options are searched on the server while the user types, one page at a
+ * time, instead of loading every campaign or mailing upfront.
+ */
+export class FilterAutocomplete extends Component {
+    static template = "dashboard_metricas_mail.FilterAutocomplete";
+    static components = { AutoComplete };
+    static props = {
+        // "campaign" or "mailing"
+        kind: String,
+        // Name of the selected record ("" when nothing is selected)
+        label: { type: String, optional: true },
+        placeholder: String,
+        // Label of the option clearing the filter
+        emptyLabel: String,
+        // Extra arguments of search_filter_options (campaign_id, date_from, date_to)
+        searchArgs: { type: Object, optional: true },
+        onSelect: Function,
+    };
+
+    setup() {
+        this.orm = useService("orm");
+        // Pages already loaded for the current search term and arguments
+        this.page = null;
+    }
+
+    get sources() {
+        return [{
+            placeholder: _t("Loading..."),
+            options: (request) => this.loadOptions(request),
+        }];
+    }
+
+    async loadOptions(request) {
+        const key = JSON.stringify([request, this.props.searchArgs || {}]);
+        if (!this.page || this.page.key !== key) {
+            this.page = { key, search: request, records: [], hasMore: false };
+            await this.loadNextPage();
+        }
+        const options = this.page.records.map((record) => ({ label: record.name, id: record.id }));
+        if (!request) {
+            options.unshift({ label: this.props.emptyLabel, id: false });
+        }
+        if (this.page.hasMore) {
+            options.push({ label: _t("Load more..."), loadMore: true, classList: "fst-italic text-muted" });
+        }
+        return options;
+    }
+
+    async loadNextPage() {
+        const page = this.page;
+        const result = await this.orm.call("marketing.dashboard.handler", "search_filter_options", [this.props.kind], {
+            ...(this.props.searchArgs || {}),
+            search: page.search,
+            limit: PAGE_SIZE,
+            offset: page.records.length,
+        });
+        page.records.push(...result.records);
+        page.hasMore = result.has_more;
+    }
+
+    async onSelect(option) {
+        if (option.loadMore) {
+            // The next opening of the dropdown shows the additional page
+            await this.loadNextPage();
+            return;
+        }
+        this.props.onSelect(option.id || "", option.id ? option.label : "");
+    }
+}
@@ -2,13 +2,72 @@
 
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { Component, onWillStart, useState } from "@odoo/owl";
+import { _t } from "@web/core/l10n/translation";
+import { user } from "@web/core/user";
+import { Component, onWillStart, onWillUnmount, useEffect, useRef, useState } from "@odoo/owl";
 import { loadBundle } from "@web/core/assets";
+import { deserializeDateTime, serializeDateTime } from "@web/core/l10n/dates";
+import { session } from "@web/session";
+import { FilterAutocomplete } from "./filter_autocomplete";
+import { PayloadCache } from "./payload_cache";
+
+const { DateTime } = luxon;
+
+// Colors of the trend chart per metric
+const TREND_COLORS = {
+    opens: "#4e73df",
+    clicks: "#36b9cc",
+    bounces: "#e74a3b",
+    revenue: "#1cc88a",
+};
+
+// Polling of a stale snapshot while the server recomputes it
+const SNAPSHOT_POLL_INTERVAL = 3000;
+const SNAPSHOT_POLL_ATTEMPTS = 20;
+
+// Live counter deltas pushed on the bus, applied at most once per interval
+const BUS_CHANNEL_PREFIX = "dashboard_metricas_mail.";
+const BUS_DELTA_TYPE = "dashboard_metricas_mail/delta";
+const DELTA_FLUSH_INTERVAL = 1000;
+
+// Rates of the approximate mode with a confidence interval, in display order
+const APPROXIMATE_RATES = {
+    sent_rate: _t("Sent"),
+    delivery_rate: _t("Delivered"),
+    bounce_rate: _t("Bounced"),
+    exception_rate: _t("Exception"),
+    open_rate: _t("Open Rate"),
+    click_rate: _t("Click Rate"),
+    reply_rate: _t("Reply Rate"),
+    ctor: _t("CTOR"),
+};
+
+// Page size of the "all links" view
+const LINK_RANKING_PAGE_SIZE = 50;
+
+// Browser cache of the last payloads: number of filter combinations kept, and
+// age (ms) under which a cached payload is shown without asking the server
+const PAYLOAD_CACHE_SIZE = 50;
+const PAYLOAD_FRESH_FOR = 60 * 1000;
+
+// Dashboard sections, fetched concurrently by group through get_panels_data: the
+// sections built on the trace aggregation come together so it runs only once
+const PANEL_GROUPS = [
+    ["deliverability", "engagement", "conversion"],
+    ["list_health"],
+    ["campaign_stages"],
+    ["top_links"],
+    ["top_campaigns"],
+    ["top_mailings"],
+    ["ab_testing"],
+];
+const PANELS = PANEL_GROUPS.flat();
 
 export class MarketingDashboard extends Component {
     setup() {
         this.orm = useService("orm");
         this.action = useService("action");
+        this.busService = useService("bus_service");
 
         // Initialize state with stored filters if available
         const storedFilters = JSON.parse(localStorage.getItem('marketing_dashboard_filters')) || {};
@@ -30,80 +89,638 @@ export class MarketingDashboard extends Component {
                 top_links: [],
                 top_campaigns: [],
                 top_mailings: [],
-                ab_testing: {},
+                ab_testing: { tests: [] },
             },
             filters: {
                 campaign_id: parseInt(storedFilters.campaign_id) || "",
                 mailing_id: parseInt(storedFilters.mailing_id) || "",
+                // Names of the selected campaign / mailing, loaded by loadFilters
+                campaign_name: "",
+                mailing_name: "",
+                // "" (all time), a number of days ("7", "30", "90") or "custom"
+                date_preset: storedFilters.date_preset || "",
+                date_from: storedFilters.date_from || "",
+                date_to: storedFilters.date_to || "",
             },
-            options: {
-                campaigns: [],
-                mailings: [],
+            // Loading state per card, each panel renders as soon as its data arrives
+            panelLoading: Object.fromEntries(PANELS.map((panel) => [panel, true])),
+            trend: {
+                metric: "opens",
+                granularity: "day",
+                data: { points: [] },
+                loading: true,
             },
-            loading: true,
+            cacheStats: null,
+            // Timings per panel (debug mode only), see get_panel_data(with_perf)
+            perf: {},
+            showPerf: true,
+            // Metadata of the background snapshot shown (unfiltered and campaign views)
+            snapshot: null,
+            // Storage time of the cached payload shown while revalidating, null once fresh
+            cachedAt: null,
+            // "All links" view of the Top Clicked Links panel, one page at a time
+            allLinks: { open: false, links: [], total: 0, offset: 0, limit: LINK_RANKING_PAGE_SIZE, loading: false },
         });
+        this.payloadCache = new PayloadCache(`dashboard_metricas_mail_${session.db}`, PAYLOAD_CACHE_SIZE);
+        // Incremented on every fetch so late answers for previous filters are dropped
+        this.fetchId = 0;
+
+        this.trendCanvas = useRef("trendChart");
+        this.trendChart = null;
 
         onWillStart(async () => {
             await Promise.all([
+                loadBundle("web.chartjs_lib"),
                 this.loadFilters(),
                 this.fetchData(),
             ]);
         });
+
+        // Redraw the trend chart whenever its data changes
+        useEffect(
+            () => this.renderTrendChart(),
+            () => [this.state.trend.data]
+        );
+        // Counter deltas received on the bus and not applied yet
+        this.busChannel = null;
+        this.pendingDeltas = [];
+        this.onBusDelta = (payload) => this.queueDelta(payload);
+        this.busService.subscribe(BUS_DELTA_TYPE, this.onBusDelta);
+
+        onWillUnmount(() => {
+            this.trendChart?.destroy();
+            clearTimeout(this.snapshotTimeout);
+            clearTimeout(this.deltaTimeout);
+            this.busService.unsubscribe(BUS_DELTA_TYPE, this.onBusDelta);
+            if (this.busChannel) {
+                this.busService.deleteChannel(this.busChannel);
+            }
+        });
+    }
+
+    async loadCacheStats() {
+        // Cache counters are only exposed to administrators
+        if (!user.isSystem) {
+            return;
+        }
+        try {
+            this.state.cacheStats = await this.orm.call("marketing.dashboard.handler", "get_cache_stats", []);
+        } catch (error) {
+            console.error("Error loading cache statistics:", error);
+        }
     }
 
     async loadFilters() {
+        // Options are searched lazily by the autocompletes, only the names of
+        // the stored selection are needed here
+        const loadSelected = async (kind, selectedId) => {
+            if (!selectedId) {
+                return "";
+            }
+            const result = await this.orm.call("marketing.dashboard.handler", "search_filter_options", [kind], {
+                limit: 0,
+                selected_id: selectedId,
+            });
+            return result.selected ? result.selected.name : "";
+        };
         try {
-            // Pass the current campaign_id to filter mailings
-            const args = [
-                this.state.filters.campaign_id || null,
-                this.state.filters.mailing_id || null
-            ];
-            const result = await this.orm.call("marketing.dashboard.handler", "get_filter_options", args);
-            this.state.options = result;
+            const [campaignName, mailingName] = await Promise.all([
+                loadSelected("campaign", this.state.filters.campaign_id),
+                loadSelected("mailing", this.state.filters.mailing_id),
+            ]);
+            this.state.filters.campaign_name = campaignName;
+            this.state.filters.mailing_name = mailingName;
         } catch (error) {
             console.error("Error loading filters:", error);
         }
     }
 
+    get mailingSearchArgs() {
+        // Mailing options follow the selected campaign and the date window
+        const [date_from, date_to] = this.getDateRange();
+        return {
+            campaign_id: this.state.filters.campaign_id || null,
+            date_from,
+            date_to,
+        };
+    }
+
+    /**
+     * URL of the per-mailing export of the current filters, streamed by the server.
+     */
+    exportUrl(format) {
+        const [date_from, date_to] = this.getDateRange();
+        const { campaign_id, mailing_id } = this.state.filters;
+        const params = { campaign_id, mailing_id, date_from, date_to };
+        const query = new URLSearchParams();
+        for (const [name, value] of Object.entries(params)) {
+            if (value) {
+                query.set(name, value);
+            }
+        }
+        return `/dashboard_metricas_mail/export/${format}?${query}`;
+    }
+
+    toggleAllLinks() {
+        this.state.allLinks.open = !this.state.allLinks.open;
+        if (this.state.allLinks.open) {
+            this.fetchAllLinks(0);
+        }
+    }
+
+    async fetchAllLinks(offset) {
+        const requestId = (this.allLinksId = (this.allLinksId || 0) + 1);
+        this.state.allLinks.loading = true;
+        try {
+            const result = await this.orm.call("marketing.dashboard.handler", "get_link_ranking", [
+                this.state.filters.campaign_id || null,
+                this.state.filters.mailing_id || null,
+                ...this.getDateRange(),
+            ], { limit: LINK_RANKING_PAGE_SIZE, offset });
+            if (requestId === this.allLinksId) {
+                Object.assign(this.state.allLinks, result);
+            }
+        } catch (error) {
+            console.error("Error loading links:", error);
+        } finally {
+            if (requestId === this.allLinksId) {
+                this.state.allLinks.loading = false;
+            }
+        }
+    }
+
     async fetchData() {
-        this.state.loading = true;
+        const fetchId = ++this.fetchId;
+        clearTimeout(this.snapshotTimeout);
+        this.updateBusChannel();
+        // The refetched figures already include the deltas received so far
+        this.pendingDeltas = [];
+        this.state.snapshot = null;
+        if (this.state.allLinks.open) {
+            this.fetchAllLinks(0);
+        }
+
+        // Render the last known figures of these filters right away (stale-while-revalidate)
+        const cacheKey = this.payloadCacheKey;
+        const cached = await this.payloadCache.get(cacheKey);
+        if (fetchId !== this.fetchId) {
+            return;
+        }
+        this.state.cachedAt = null;
+        if (cached) {
+            const hasTrend = this.applyCachedPayload(cached.payload);
+            if (Date.now() - cached.storedAt < PAYLOAD_FRESH_FOR) {
+                // Recently viewed: no round trip, the bus keeps the cards up to date
+                if (!hasTrend) {
+                    await this.fetchTrend();
+                }
+                return;
+            }
+            this.state.cachedAt = cached.storedAt;
+        }
+
+        const trend = this.fetchTrend();
+        // Serve the view from its snapshot when there is one, panel by panel otherwise
+        let complete = await this.fetchSnapshot(fetchId);
+        if (!complete) {
+            const results = await Promise.all(PANEL_GROUPS.map((panels) => this.fetchPanels(panels, fetchId)));
+            complete = results.every(Boolean);
+        }
+        await trend;
+        if (fetchId === this.fetchId) {
+            this.state.cachedAt = null;
+            if (complete) {
+                await this.storePayload(cacheKey);
+            }
+        }
+        await this.loadCacheStats();
+    }
+
+    get payloadCacheKey() {
+        // Payloads depend on the user (access rules), companies, language and filters
+        return JSON.stringify([
+            user.userId,
+            user.context.allowed_company_ids,
+            user.lang,
+            this.state.filters.campaign_id || null,
+            this.state.filters.mailing_id || null,
+            ...this.getDateRange(),
+        ]);
+    }
+
+    /**
+     * Show a cached payload, returns whether it held the trend currently selected.
+     */
+    applyCachedPayload(payload) {
+        for (const panel of PANELS) {
+            if (payload.metrics[panel]) {
+                this.state.metrics[panel] = payload.metrics[panel];
+                this.state.panelLoading[panel] = false;
+            }
+        }
+        const { trend } = payload;
+        if (trend && trend.metric === this.state.trend.metric && trend.granularity === this.state.trend.granularity) {
+            this.state.trend.data = trend.data;
+            this.state.trend.loading = false;
+            return true;
+        }
+        return false;
+    }
+
+    storePayload(cacheKey) {
+        const { metric, granularity, data } = this.state.trend;
+        return this.payloadCache.set(cacheKey, JSON.parse(JSON.stringify({
+            metrics: this.state.metrics,
+            trend: { metric, granularity, data },
+        })));
+    }
+
+    get cachedAge() {
+        return this.state.cachedAt ? DateTime.fromMillis(this.state.cachedAt).toRelative() : "";
+    }
+
+    callSnapshot() {
+        return this.orm.call("marketing.dashboard.handler", "get_dashboard_snapshot", [
+            this.state.filters.campaign_id || null,
+            ...this.getDateRange(),
+        ]);
+    }
+
+    /**
+     * Show the snapshot of an unfiltered or campaign level view.
+     * Returns false when the panels must be fetched instead (mailing filter,
+     * snapshots disabled or not computed yet).
+     */
+    async fetchSnapshot(fetchId) {
+        this.state.snapshot = null;
+        if (this.state.filters.mailing_id) {
+            return false;
+        }
+        let result;
+        try {
+            result = await this.callSnapshot();
+        } catch (error) {
+            console.error("Error fetching dashboard snapshot:", error);
+            return false;
+        }
+        if (fetchId !== this.fetchId) {
+            return true;
+        }
+        if (!result.data) {
+            return false;
+        }
+        this.applySnapshot(result);
+        if (result.snapshot.stale) {
+            this.pollSnapshot(fetchId, result.snapshot.computed_at);
+        }
+        return true;
+    }
+
+    applySnapshot({ data, snapshot }) {
+        for (const panel of PANELS) {
+            if (panel in data) {
+                this.state.metrics[panel] = data[panel];
+                this.state.panelLoading[panel] = false;
+                if (data._perf) {
+                    this.state.perf[panel] = data._perf;
+                }
+            }
+        }
+        this.state.snapshot = snapshot;
+    }
+
+    pollSnapshot(fetchId, computedAt, attempt = 0) {
+        // Swap in the fresh figures once the cron has recomputed the snapshot
+        if (attempt >= SNAPSHOT_POLL_ATTEMPTS) {
+            return;
+        }
+        this.snapshotTimeout = setTimeout(async () => {
+            let result;
+            try {
+                result = await this.callSnapshot();
+            } catch (error) {
+                console.error("Error polling dashboard snapshot:", error);
+                return;
+            }
+            if (fetchId !== this.fetchId) {
+                return;
+            }
+            if (result.data && result.snapshot.computed_at !== computedAt) {
+                this.applySnapshot(result);
+                await this.storePayload(this.payloadCacheKey);
+            } else {
+                this.state.snapshot = result.snapshot;
+                this.pollSnapshot(fetchId, computedAt, attempt + 1);
+            }
+        }, SNAPSHOT_POLL_INTERVAL);
+    }
+
+    /**
+     * Listen to the bus channel matching the filters (mailing, campaign or
+     * global). Windows ending before today cannot change, they are not followed.
+     */
+    updateBusChannel() {
+        const { campaign_id, mailing_id } = this.state.filters;
+        const [, dateTo] = this.getDateRange();
+        let channel = null;
+        if (!dateTo || dateTo >= DateTime.local().toISODate()) {
+            if (mailing_id) {
+                channel = `${BUS_CHANNEL_PREFIX}mailing_${mailing_id}`;
+            } else if (campaign_id) {
+                channel = `${BUS_CHANNEL_PREFIX}campaign_${campaign_id}`;
+            } else {
+                channel = `${BUS_CHANNEL_PREFIX}global_${user.context.allowed_company_ids[0]}`;
+            }
+        }
+        if (channel === this.busChannel) {
+            return;
+        }
+        if (this.busChannel) {
+            this.busService.deleteChannel(this.busChannel);
+        }
+        this.busChannel = channel;
+        this.pendingDeltas = [];
+        if (channel) {
+            this.busService.addChannel(channel);
+        }
+    }
+
+    queueDelta(payload) {
+        if (payload.channel !== this.busChannel) {
+            return;
+        }
+        // Deltas are grouped by UTC slices of trace creation time: keep those
+        // falling within the window, in the user timezone like the server filters
+        const [dateFrom, dateTo] = this.getDateRange();
+        const tz = user.context.tz || "UTC";
+        for (const delta of payload.deltas) {
+            const date = DateTime.fromSQL(delta.datetime, { zone: "utc" }).setZone(tz).toISODate();
+            if ((!dateFrom || date >= dateFrom) && (!dateTo || date <= dateTo)) {
+                this.pendingDeltas.push(delta);
+            }
+        }
+        if (this.pendingDeltas.length && !this.deltaTimeout) {
+            this.deltaTimeout = setTimeout(() => {
+                this.deltaTimeout = null;
+                this.applyDeltas();
+            }, DELTA_FLUSH_INTERVAL);
+        }
+    }
+
+    /**
+     * Update the trace based cards in place, with the same formulas as the server.
+     */
+    applyDeltas() {
+        const counters = {};
+        const links = {};
+        for (const delta of this.pendingDeltas) {
+            for (const [name, value] of Object.entries(delta.counters)) {
+                counters[name] = (counters[name] || 0) + value;
+            }
+            for (const [linkId, value] of Object.entries(delta.links)) {
+                links[linkId] = (links[linkId] || 0) + value;
+            }
+        }
+        this.pendingDeltas = [];
+        const add = (name) => counters[name] || 0;
+        const rate = (value, base) => (base ? (value / base) * 100 : 0);
+
+        const deliverability = this.state.metrics.deliverability;
+        if (deliverability.sent !== undefined) {
+            deliverability.sent += add("sent");
+            deliverability.delivered += add("delivered");
+            deliverability.bounced += add("bounced");
+            deliverability.exception += add("exception");
+            deliverability.total = (deliverability.total || 0) + add("total");
+            const attempts = deliverability.sent + deliverability.exception;
+            deliverability.delivery_rate = rate(deliverability.delivered, attempts);
+            deliverability.bounce_rate = rate(deliverability.bounced, attempts);
+            deliverability.exception_rate = rate(deliverability.exception, attempts);
+            deliverability.sent_rate = rate(deliverability.sent, attempts);
+        }
+
+        const engagement = this.state.metrics.engagement;
+        if (engagement.total_opens !== undefined) {
+            engagement.total_opens += add("opened");
+            engagement.total_clicks += add("clicked");
+            engagement.total_replies += add("replied");
+            const delivered = deliverability.delivered || 0;
+            engagement.open_rate = rate(engagement.total_opens, delivered);
+            engagement.click_rate = rate(engagement.total_clicks, delivered);
+            engagement.reply_rate = rate(engagement.total_replies, delivered);
+            engagement.ctor = rate(engagement.total_clicks, engagement.total_opens);
+        }
+
+        const conversion = this.state.metrics.conversion;
+        if (deliverability.sent !== undefined) {
+            conversion.conversion_rate = rate(conversion.total_conversions, deliverability.sent);
+            conversion.revenue_per_email = deliverability.sent ? conversion.total_revenue / deliverability.sent : 0;
+        }
+
+        if (Object.keys(links).length) {
+            for (const link of this.state.metrics.top_links) {
+                link.count += links[link.id] || 0;
+            }
+            this.state.metrics.top_links.sort((a, b) => b.count - a.count);
+        }
+    }
+
+    get snapshotAge() {
+        const computedAt = this.state.snapshot && this.state.snapshot.computed_at;
+        return computedAt ? deserializeDateTime(computedAt).toRelative() : "";
+    }
+
+    async fetchTrend() {
+        const trendId = (this.trendId = (this.trendId || 0) + 1);
+        this.state.trend.loading = true;
+        try {
+            const [date_from, date_to] = this.getDateRange();
+            const result = await this.orm.call("marketing.dashboard.handler", "get_metric_timeseries", [
+                this.state.trend.metric,
+                this.state.trend.granularity,
+                {
+                    campaign_id: this.state.filters.campaign_id || null,
+                    mailing_id: this.state.filters.mailing_id || null,
+                    date_from,
+                    date_to,
+                },
+            ]);
+            if (trendId === this.trendId) {
+                this.state.trend.data = result;
+            }
+        } catch (error) {
+            console.error("Error fetching metric trend:", error);
+        } finally {
+            if (trendId === this.trendId) {
+                this.state.trend.loading = false;
+            }
+        }
+    }
+
+    async onTrendChange(ev) {
+        const { name, value } = ev.target;
+        this.state.trend[name] = value;
+        await this.fetchTrend();
+    }
+
+    renderTrendChart() {
+        if (!this.trendCanvas.el) {
+            return;
+        }
+        const { metric, points } = this.state.trend.data;
+        this.trendChart?.destroy();
+        this.trendChart = new Chart(this.trendCanvas.el, {
+            type: "line",
+            data: {
+                labels: points.map((point) => point.date),
+                datasets: [{
+                    data: points.map((point) => point.value),
+                    borderColor: TREND_COLORS[metric],
+                    backgroundColor: TREND_COLORS[metric] + "33",
+                    fill: true,
+                    tension: 0.3,
+                    pointRadius: points.length > 60 ? 0 : 3,
+                }],
+            },
+            options: {
+                maintainAspectRatio: false,
+                plugins: { legend: { display: false } },
+                scales: { y: { beginAtZero: true } },
+            },
+        });
+    }
+
+    /**
+     * Fetch a group of sections, returns whether it succeeded.
+     */
+    async fetchPanels(panels, fetchId) {
+        // Cached figures stay fully visible while they are revalidated
+        if (!this.state.cachedAt) {
+            for (const panel of panels) {
+                this.state.panelLoading[panel] = true;
+            }
+        }
         try {
             const args = [
+                panels,
                 this.state.filters.campaign_id || null,
                 this.state.filters.mailing_id || null,
+                ...this.getDateRange(),
             ];
-            const result = await this.orm.call("marketing.dashboard.handler", "get_dashboard_data", args);
-            // Ensure defaults for new keys if backend cache is stale
-            result.top_campaigns = result.top_campaigns || [];
-            result.top_mailings = result.top_mailings || [];
-            this.state.metrics = result;
+            const kwargs = this.env.debug ? { with_perf: true } : {};
+            const result = await this.orm.call("marketing.dashboard.handler", "get_panels_data", args, kwargs);
+            if (fetchId !== this.fetchId) {
+                return false;
+            }
+            for (const panel of panels) {
+                this.state.metrics[panel] = result[panel];
+                if (this.env.debug) {
+                    this.state.perf[panel] = result._perf;
+                }
+            }
+            return true;
         } catch (error) {
-            console.error("Error fetching dashboard data:", error);
+            console.error(`Error fetching dashboard panels ${panels.join(", ")}:`, error);
+            return false;
         } finally {
-            this.state.loading = false;
+            if (fetchId === this.fetchId) {
+                for (const panel of panels) {
+                    this.state.panelLoading[panel] = false;
+                }
+            }
+        }
+    }
+
+    get perfRows() {
+        // Slowest panels first; the total is the one of the request, shared steps (_filters,
+        // _trace_stats) included and shared by the panels fetched in the same group
+        return Object.entries(this.state.perf)
+            .filter(([, perf]) => perf)
+            .map(([panel, perf]) => ({
+                panel,
+                duration_ms: perf.duration_ms,
+                queries: perf.queries,
+                rows: perf.sections[panel] ? perf.sections[panel].rows : 0,
+                section_ms: perf.sections[panel] ? perf.sections[panel].duration_ms : 0,
+                computed_at: perf.computed_at,
+            }))
+            .sort((a, b) => b.duration_ms - a.duration_ms);
+    }
+
+    async onFilterSelect(name, id, label) {
+        if (name === 'campaign_id') {
+            this.state.filters.campaign_name = label;
+            // When campaign changes, the mailing options follow the new campaign
+            // and the mailing selection is reset as it might not belong to it
+            this.state.filters.mailing_id = "";
+            this.state.filters.mailing_name = "";
+        } else {
+            this.state.filters.mailing_name = label;
         }
+        this.state.filters[name] = id;
+        await this.applyFilters();
     }
 
     async onFilterChange(ev) {
         const { name, value } = ev.target;
         this.state.filters[name] = value;
 
-        if (name === 'campaign_id') {
-            // When campaign changes, we must reload the mailing options
-            // and reset the mailing selection as it might not belong to the new campaign
-            this.state.filters.mailing_id = "";
-            await this.loadFilters();
+        if (name === 'date_preset' && value === 'custom' && !this.state.filters.date_from) {
+            // Start the custom range from the last 30 days
+            [this.state.filters.date_from, this.state.filters.date_to] = this.getPresetRange(30);
         }
+        await this.applyFilters();
+    }
 
+    async applyFilters() {
         // Save filters to localStorage
         localStorage.setItem('marketing_dashboard_filters', JSON.stringify({
             campaign_id: this.state.filters.campaign_id,
-            mailing_id: this.state.filters.mailing_id
+            mailing_id: this.state.filters.mailing_id,
+            date_preset: this.state.filters.date_preset,
+            date_from: this.state.filters.date_from,
+            date_to: this.state.filters.date_to,
         }));
 
         await this.fetchData();
     }
 
+    getPresetRange(days) {
+        // Last N days, today included
+        const today = DateTime.local();
+        return [today.minus({ days: days - 1 }).toISODate(), today.toISODate()];
+    }
+
+    /**
+     * Current date window as [date_from, date_to] (inclusive days, null when open).
+     * Presets are relative to today so they keep rolling between visits.
+     */
+    getDateRange() {
+        const { date_preset, date_from, date_to } = this.state.filters;
+        if (!date_preset) {
+            return [null, null];
+        }
+        if (date_preset === 'custom') {
+            return [date_from || null, date_to || null];
+        }
+        return this.getPresetRange(parseInt(date_preset));
+    }
+
+    /**
+     * Domain restricting a datetime field to the date window, for drill-down views.
+     */
+    getDateDomain(fieldName) {
+        const [dateFrom, dateTo] = this.getDateRange();
+        const domain = [];
+        if (dateFrom) {
+            domain.push([fieldName, '>=', serializeDateTime(DateTime.fromISO(dateFrom))]);
+        }
+        if (dateTo) {
+            domain.push([fieldName, '<', serializeDateTime(DateTime.fromISO(dateTo).plus({ days: 1 }))]);
+        }
+        return domain;
+    }
+
     openView(res_model, domain, context = {}) {
         this.action.doAction({
             type: "ir.actions.act_window",
@@ -148,6 +765,7 @@ export class MarketingDashboard extends Component {
             // We don't need to push any specific status domain here as we want ALL traces
         }
 
+        domain.push(...this.getDateDomain('create_date'));
         this.openView("mailing.trace", domain);
     }
 
@@ -165,6 +783,20 @@ export class MarketingDashboard extends Component {
         this.openView("mailing.contact", domain);
     }
 
+    openMailing(mailingId) {
+        this.action.doAction({
+            type: "ir.actions.act_window",
+            res_model: "mailing.mailing",
+            res_id: mailingId,
+            views: [[false, "form"]],
+            target: "current",
+        });
+    }
+
+    openListSubscriptions(listId) {
+        this.openView("mailing.subscription", [['list_id', '=', listId]]);
+    }
+
     openStage(stageId) {
         // Open campaigns in this stage
         const domain = [['stage_id', '=', stageId]];
@@ -174,39 +806,16 @@ export class MarketingDashboard extends Component {
         this.openView("utm.campaign", domain);
     }
 
-    async openConversion(type) {
+    openConversion(type) {
+        // Orders attributed to the filtered mailings, by UTM source or customer
+        // click, like the conversion card (see marketing.dashboard.attribution)
         const domain = [];
-
-        // Apply filters (prioritizing mailing_id as per requirements)
         if (this.state.filters.mailing_id) {
-            // We need to find the source_id of this mailing to filter orders
-            const mailings = await this.orm.read("mailing.mailing", [parseInt(this.state.filters.mailing_id)], ["source_id"]);
-            if (mailings && mailings.length > 0 && mailings[0].source_id) {
-                domain.push(['source_id', '=', mailings[0].source_id[0]]);
-            } else {
-                // If the mailing has no source_id, it cannot have generated orders via standard tracking
-                // Force an empty result to match backend logic
-                domain.push(['id', '=', -1]);
-            }
+            domain.push(['dashboard_mailing_id', '=', parseInt(this.state.filters.mailing_id)]);
         } else if (this.state.filters.campaign_id) {
-            // STRICT FILTERING: Match Dashboard Logic
-            // Fetch all mailings for this campaign to get their source_ids
-            const mailings = await this.orm.searchRead(
-                "mailing.mailing",
-                [['campaign_id', '=', parseInt(this.state.filters.campaign_id)]],
-                ['source_id']
-            );
-
-            // Extract source_ids (filtering out any nulls)
-            const sourceIds = mailings
-                .map(m => m.source_id && m.source_id[0])
-                .filter(id => id);
-
-            if (sourceIds.length > 0) {
-                domain.push(['source_id', 'in', sourceIds]);
-            } else {
-                domain.push(['id', '=', -1]);
-            }
+            domain.push(['dashboard_mailing_id.campaign_id', '=', parseInt(this.state.filters.campaign_id)]);
+        } else {
+            domain.push(['dashboard_mailing_id', '!=', false]);
         }
 
         if (type === 'potential') {
@@ -226,6 +835,7 @@ export class MarketingDashboard extends Component {
         }
         // 'all' or others could just not filter state
 
+        domain.push(...this.getDateDomain('date_order'));
         this.openView("sale.order", domain);
     }
 
@@ -248,6 +858,7 @@ export class MarketingDashboard extends Component {
             domain.push(['mass_mailing_id.campaign_id', '=', parseInt(this.state.filters.campaign_id)]);
         }
 
+        domain.push(...this.getDateDomain('create_date'));
         this.openView("mailing.trace", domain);
     }
 
@@ -314,6 +925,31 @@ export class MarketingDashboard extends Component {
         return new Intl.NumberFormat('en-US', { style: 'currency', currency: 'USD' }).format(value);
     }
 
+    /**
+     * Tooltip of an estimated section: why and how it was estimated, and the
+     * 95% confidence interval of every rate. The conversion section only
+     * carries a boolean, its rates depend on the estimated sent count.
+     */
+    approximateTitle(approximate) {
+        if (approximate === true) {
+            return _t("The rates are based on an estimated number of sent emails.");
+        }
+        const lines = [
+            approximate.reason === "timeout"
+                ? _t("The exact figures took too long to compute.")
+                : _t("Approximate mode is enabled."),
+            _t("Estimated from a %(percent)s% sample of %(count)s traces (95% confidence):", {
+                percent: approximate.sample_percent,
+                count: this.formatNumber(approximate.sample_size),
+            }),
+        ];
+        for (const [rate, label] of Object.entries(APPROXIMATE_RATES)) {
+            const [low, high] = approximate.bounds[rate];
+            lines.push(`${label}: ${this.formatPercentage(low)} - ${this.formatPercentage(high)}`);
+        }
+        return lines.join("\n");
+    }
+
     formatPercentage(value) {
         if (value === undefined || value === null) return "0%";
         return parseFloat(value).toFixed(1) + "%";
@@ -350,5 +986,6 @@ export class MarketingDashboard extends Component {
 }
 
 MarketingDashboard.template = "dashboard_metricas_mail.MarketingDashboard";
+MarketingDashboard.components = { FilterAutocomplete };
 
 registry.category("actions").add("dashboard_metricas_mail.dashboard", MarketingDashboard);
@@ -0,0 +1,100 @@
+/** @odoo-module */
+
+const DB_VERSION = 1;
+const STORE = "payloads";
+
+/**
+ * IndexedDB cache of the last dashboard payloads, evicting the least recently
+ * used entries beyond maxEntries. Every method resolves (to null when the
+ * entry is missing) even when IndexedDB is unavailable, e.g. in private
+ * browsing, so the dashboard simply falls back to the server.
+ */
+export class PayloadCache {
+    constructor(name, maxEntries) {
+        this.name = name;
+        this.maxEntries = maxEntries;
+        this.dbPromise = null;
+    }
+
+    open() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = window.indexedDB.open(this.name, DB_VERSION);
+                request.onupgradeneeded = () => {
+                    const store = request.result.createObjectStore(STORE, { keyPath: "key" });
+                    store.createIndex("accessed", "accessed");
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+                request.onblocked = () => resolve(null);
+            });
+        }
+        return this.dbPromise;
+    }
+
+    async transaction(mode, callback) {
+        const db = await this.open();
+        if (!db) {
+            return null;
+        }
+        return new Promise((resolve) => {
+            let result = null;
+            try {
+                const transaction = db.transaction(STORE, mode);
+                const store = transaction.objectStore(STORE);
+                callback(store, (value) => (result = value));
+                transaction.oncomplete = () => resolve(result);
+                transaction.onerror = () => resolve(null);
+                transaction.onabort = () => resolve(null);
+            } catch {
+                resolve(null);
+            }
+        });
+    }
+
+    /**
+     * Return { payload, storedAt } for the key, or null. Reading an entry
+     * makes it the most recently used one.
+     */
+    get(key) {
+        return this.transaction("readwrite", (store, setResult) => {
+            const request = store.get(key);
+            request.onsuccess = () => {
+                const entry = request.result;
+                if (!entry) {
+                    return;
+                }
+                entry.accessed = Date.now();
+                store.put(entry);
+                setResult({ payload: entry.payload, storedAt: entry.storedAt });
+            };
+        });
+    }
+
+    set(key, payload) {
+        return this.transaction("readwrite", (store) => {
+            const now = Date.now();
+            store.put({ key, payload, storedAt: now, accessed: now });
+            // Evict the least recently used entries beyond the limit
+            const countRequest = store.count();
+            countRequest.onsuccess = () => {
+                let excess = countRequest.result - this.maxEntries;
+                if (excess <= 0) {
+                    return;
+                }
+                store.index("accessed").openCursor().onsuccess = (event) => {
+                    const cursor = event.target.result;
+                    if (cursor && excess > 0) {
+                        cursor.delete();
+                        excess--;
+                        cursor.continue();
+                    }
+                };
+            };
+        });
+    }
+}
@@ -0,0 +1,5 @@
+from . import test_dashboard_attribution
+from . import test_dashboard_benchmark
+from . import test_dashboard_daily_stat
+from . import test_dashboard_link_ranking
+from . import test_dashboard_queries
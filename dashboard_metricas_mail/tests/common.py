@@ -0,0 +1,309 @@
+from odoo.tools import SQL
+
+# Shape of the synthetic dataset, expressed per generated trace
+TRACES_PER_MAILING = 1000
+MAILINGS_PER_CAMPAIGN = 10
+TRACES_PER_CONTACT = 10
+TRACES_PER_ORDER = 100
+LINKS_PER_MAILING = 5
+MAILING_LISTS = 20
+# One contact out of BLACKLIST_EVERY is blacklisted, one subscription out of OPT_OUT_EVERY is opted-out
+BLACKLIST_EVERY = 50
+OPT_OUT_EVERY = 20
+# Generated records are spread over the last DATA_SPAN_DAYS days
+DATA_SPAN_DAYS = 365
+
+
+class DashboardDataGenerator:
+    """
+    Fill the database with a synthetic mass mailing history for benchmarks.
+    Campaigns, mailings and lists go through the ORM (they are few), while
+    contacts, traces, links, clicks and orders are inserted in bulk with
+    INSERT ... SELECT over generate_series, then the orders are attributed.
+    Every call to generate() adds a new batch, so growing sizes can be
+    measured one after the other without regenerating the smaller ones.
+    The values only depend on the row position: two runs produce the same data.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.traces = 0
+        self.batch = 0
+        self.now = env.cr.now()
+        self.lists = env['mailing.list']
+
+    def generate(self, traces):
+        """
+        Add ``traces`` mailing traces with the mailings, campaigns, contacts,
+        links, clicks and orders matching the ratios of this module.
+        """
+        if traces <= 0:
+            return
+        self.batch += 1
+        if not self.lists:
+            self.lists = self.env['mailing.list'].create([
+                {'name': f'Benchmark list {index}'} for index in range(MAILING_LISTS)
+            ])
+
+        mailings = self._create_mailings(max(1, traces // TRACES_PER_MAILING))
+        first_contact = self._insert_contacts(max(1, traces // TRACES_PER_CONTACT))
+        first_trace, last_trace = self._insert_traces(traces, mailings, first_contact)
+        self._insert_links(mailings)
+        self._insert_clicks(first_trace, last_trace)
+        self._insert_orders(max(1, traces // TRACES_PER_ORDER), mailings)
+        # Orders inserted in SQL skip the ORM hooks maintaining their attribution
+        self.env['marketing.dashboard.attribution']._refresh_orders(None)
+
+        self.traces += traces
+        self.env.invalidate_all()
+        for table in ('mailing_contact', 'mailing_subscription', 'mail_blacklist', 'mailing_trace',
+                      'link_tracker', 'link_tracker_click', 'sale_order', 'marketing_dashboard_attribution'):
+            self.env.cr.execute(SQL("ANALYZE %s", SQL.identifier(table)))
+
+    def _spread(self, position):
+        """
+        SQL timestamp spreading rows over the last DATA_SPAN_DAYS days.
+        """
+        return SQL(
+            "%s - make_interval(secs => mod(%s * 7919, %s))",
+            self.now, position, DATA_SPAN_DAYS * 86400,
+        )
+
+    def _create_mailings(self, count):
+        Mailing = self.env['mailing.mailing'].with_context(tracking_disable=True, mail_create_nolog=True)
+        campaigns = self.env['utm.campaign'].create([
+            {'name': f'Benchmark campaign {self.batch}-{index}'}
+            for index in range(max(1, count // MAILINGS_PER_CAMPAIGN))
+        ])
+        mailings = Mailing.create([{
+            'subject': f'Benchmark mailing {self.batch}-{index}',
+            'body_html': '<p>Benchmark</p>',
+            'campaign_id': campaigns[index % len(campaigns)].id,
+            'contact_list_ids': [(4, self.lists[index % len(self.lists)].id)],
+        } for index in range(count)])
+        self.env.flush_all()
+        # Sent mailings, one A/B test out of ten
+        self.env.cr.execute(SQL(
+            """
+            UPDATE mailing_mailing
+               SET state = 'done',
+                   sent_date = %(sent_date)s,
+                   ab_testing_enabled = mod(id, 10) = 0
+             WHERE id IN %(ids)s
+            """,
+            sent_date=self._spread(SQL.identifier('id')),
+            ids=tuple(mailings.ids),
+        ))
+        mailings.invalidate_recordset()
+        return mailings
+
+    def _insert_contacts(self, count):
+        """
+        Insert contacts with their subscriptions and blacklist entries.
+        Returns the id of the first contact, the others follow it.
+        """
+        cr = self.env.cr
+        cr.execute(SQL(
+            """
+            WITH inserted AS (
+                INSERT INTO mailing_contact (name, email, email_normalized,
+                                             create_uid, create_date, write_uid, write_date)
+                SELECT 'Benchmark contact ' || g.i,
+                       'bench' || %(batch)s || '.' || g.i || '@example.com',
+                       'bench' || %(batch)s || '.' || g.i || '@example.com',
+                       %(uid)s, %(created)s, %(uid)s, %(created)s
+                  FROM generate_series(0, %(count)s - 1) AS g(i)
+                 ORDER BY g.i
+             RETURNING id
+            )
+            SELECT MIN(id) FROM inserted
+            """,
+            batch=self.batch,
+            count=count,
+            uid=self.env.uid,
+            created=self._spread(SQL("g.i")),
+        ))
+        first_contact = cr.fetchone()[0]
+        last_contact = first_contact + count - 1
+
+        cr.execute(SQL(
+            """
+            INSERT INTO mailing_subscription (contact_id, list_id, opt_out, create_uid, create_date, write_uid, write_date)
+            SELECT contact.id,
+                   (%(list_ids)s::int[])[1 + mod(contact.id, %(lists)s)],
+                   mod(contact.id, %(opt_out_every)s) = 0,
+                   %(uid)s, contact.create_date, %(uid)s, contact.create_date
+              FROM mailing_contact contact
+             WHERE contact.id BETWEEN %(first)s AND %(last)s
+            """,
+            list_ids=self.lists.ids,
+            lists=len(self.lists),
+            opt_out_every=OPT_OUT_EVERY,
+            uid=self.env.uid,
+            first=first_contact,
+            last=last_contact,
+        ))
+        cr.execute(SQL(
+            """
+            INSERT INTO mail_blacklist (email, active, create_uid, create_date, write_uid, write_date)
+            SELECT contact.email_normalized, TRUE, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM mailing_contact contact
+             WHERE contact.id BETWEEN %(first)s AND %(last)s
+               AND mod(contact.id, %(blacklist_every)s) = 0
+            """,
+            uid=self.env.uid,
+            now=self.now,
+            first=first_contact,
+            last=last_contact,
+            blacklist_every=BLACKLIST_EVERY,
+        ))
+        return first_contact
+
+    def _insert_traces(self, count, mailings, first_contact):
+        """
+        Insert traces spread over the mailings: 2% errors, 3% bounces, 35% sent
+        only, 50% opened and 10% replied; a fifth of them clicked a link.
+        Returns the ids of the first and the last trace.
+        """
+        contacts = max(1, count // TRACES_PER_CONTACT)
+        self.env.cr.execute(SQL(
+            """
+            WITH rows AS (
+                SELECT g.i,
+                       mod(g.i, 100) AS bucket,
+                       1 + mod(g.i, %(mailings)s) AS position,
+                       %(created)s AS created
+                  FROM generate_series(0, %(count)s - 1) AS g(i)
+            ), inserted AS (
+                INSERT INTO mailing_trace (trace_type, model, res_id, email, mass_mailing_id, campaign_id,
+                                           trace_status, sent_datetime, open_datetime, links_click_datetime,
+                                           reply_datetime, create_uid, create_date, write_uid, write_date)
+                SELECT 'mail', 'mailing.contact',
+                       %(first_contact)s + mod(rows.i, %(contacts)s),
+                       'bench' || %(batch)s || '.' || mod(rows.i, %(contacts)s) || '@example.com',
+                       (%(mailing_ids)s::int[])[rows.position],
+                       (%(campaign_ids)s::int[])[rows.position],
+                       CASE WHEN rows.bucket < 2 THEN 'error'
+                            WHEN rows.bucket < 5 THEN 'bounce'
+                            WHEN rows.bucket < 40 THEN 'sent'
+                            WHEN rows.bucket < 90 THEN 'open'
+                            ELSE 'reply' END,
+                       CASE WHEN rows.bucket >= 2 THEN rows.created END,
+                       CASE WHEN rows.bucket >= 40 THEN rows.created + interval '1 hour' END,
+                       CASE WHEN rows.bucket BETWEEN 60 AND 79 THEN rows.created + interval '2 hours' END,
+                       CASE WHEN rows.bucket >= 90 THEN rows.created + interval '1 day' END,
+                       %(uid)s, rows.created, %(uid)s, rows.created
+                  FROM rows
+                 ORDER BY rows.i
+             RETURNING id
+            )
+            SELECT MIN(id), MAX(id) FROM inserted
+            """,
+            mailings=len(mailings),
+            count=count,
+            created=self._spread(SQL("g.i")),
+            first_contact=first_contact,
+            contacts=contacts,
+            batch=self.batch,
+            mailing_ids=mailings.ids,
+            campaign_ids=[mailing.campaign_id.id or None for mailing in mailings],
+            uid=self.env.uid,
+        ))
+        return self.env.cr.fetchone()
+
+    def _insert_links(self, mailings):
+        self.env.cr.execute(SQL(
+            """
+            WITH inserted AS (
+                INSERT INTO link_tracker (url, title, campaign_id, source_id, medium_id,
+                                          create_uid, create_date, write_uid, write_date)
+                SELECT 'https://example.com/' || mailing.id || '/' || g.n,
+                       'Benchmark link ' || mailing.id || '/' || g.n,
+                       mailing.campaign_id, mailing.source_id, mailing.medium_id,
+                       %(uid)s, mailing.sent_date, %(uid)s, mailing.sent_date
+                  FROM mailing_mailing mailing
+            CROSS JOIN generate_series(1, %(links)s) AS g(n)
+                 WHERE mailing.id IN %(ids)s
+             RETURNING id
+            )
+            INSERT INTO link_tracker_code (code, link_id, create_uid, create_date, write_uid, write_date)
+            SELECT 'bm' || id, id, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM inserted
+            """,
+            uid=self.env.uid,
+            now=self.now,
+            links=LINKS_PER_MAILING,
+            ids=tuple(mailings.ids),
+        ))
+
+    def _insert_clicks(self, first_trace, last_trace):
+        """
+        One click per clicked trace, on one of the links of its mailing.
+        """
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO link_tracker_click (campaign_id, link_id, mailing_trace_id, mass_mailing_id, ip,
+                                            create_uid, create_date, write_uid, write_date)
+            SELECT trace.campaign_id, link.id, trace.id, trace.mass_mailing_id,
+                   '10.' || mod(trace.id / 65536, 256) || '.' || mod(trace.id / 256, 256) || '.' || mod(trace.id, 256),
+                   %(uid)s, trace.links_click_datetime, %(uid)s, trace.links_click_datetime
+              FROM mailing_trace trace
+              JOIN mailing_mailing mailing ON mailing.id = trace.mass_mailing_id
+              JOIN link_tracker link
+                ON link.source_id = mailing.source_id
+               AND link.url = 'https://example.com/' || mailing.id || '/' || (1 + mod(trace.id, %(links)s))
+             WHERE trace.id BETWEEN %(first)s AND %(last)s
+               AND trace.links_click_datetime IS NOT NULL
+            """,
+            uid=self.env.uid,
+            links=LINKS_PER_MAILING,
+            first=first_trace,
+            last=last_trace,
+        ))
+
+    def _insert_orders(self, count, mailings):
+        """
+        Clone a template order attributed to the mailings: a quarter in each of
+        draft, sent, confirmed and confirmed + invoiced. Copying the template
+        columns keeps the required fields of the installed modules filled.
+        """
+        partner = self.env['res.partner'].create({'name': f'Benchmark customer {self.batch}'})
+        template = self.env['sale.order'].create({'partner_id': partner.id})
+        self.env.flush_all()
+
+        overrides = {
+            'name': SQL("'BENCH/' || %s || '/' || g.i", self.batch),
+            'source_id': SQL("(%s::int[])[1 + mod(g.i, %s)]", [mailing.source_id.id for mailing in mailings], len(mailings)),
+            'campaign_id': SQL("(%s::int[])[1 + mod(g.i, %s)]", [mailing.campaign_id.id or None for mailing in mailings], len(mailings)),
+            'state': SQL("(ARRAY['draft', 'sent', 'sale', 'sale'])[1 + mod(g.i, 4)]"),
+            'invoice_status': SQL("(ARRAY['no', 'no', 'to invoice', 'invoiced'])[1 + mod(g.i, 4)]"),
+            'amount_untaxed': SQL("50 + mod(g.i * 37, 950)"),
+            'amount_tax': SQL("0"),
+            'amount_total': SQL("50 + mod(g.i * 37, 950)"),
+            'currency_rate': SQL("1"),
+            'date_order': self._spread(SQL("g.i")),
+            'create_date': self._spread(SQL("g.i")),
+            'write_date': self._spread(SQL("g.i")),
+        }
+        if 'medium_id' in self.env['sale.order']._fields:
+            overrides['medium_id'] = SQL("NULL")
+        self.env.cr.execute(SQL(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = 'sale_order' AND column_name != 'id'"
+        ))
+        columns = [row[0] for row in self.env.cr.fetchall()]
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO sale_order (%(columns)s)
+            SELECT %(values)s
+              FROM sale_order template
+        CROSS JOIN generate_series(0, %(count)s - 1) AS g(i)
+             WHERE template.id = %(template)s
+            """,
+            columns=SQL(", ").join(SQL.identifier(column) for column in columns),
+            values=SQL(", ").join(
+                overrides.get(column, SQL.identifier('template', column)) for column in columns
+            ),
+            count=count,
+            template=template.id,
+        ))
+        template.unlink()
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestDashboardAttribution(TransactionCase):
+    """
+    Every order is attributed to a single mailing: the mailing of its UTM
+    source first, else the mailing its customer (or the customer's company)
+    last clicked within the attribution window.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Attribution = cls.env['marketing.dashboard.attribution']
+        cls.now = fields.Datetime.now()
+        cls.company = cls.env['res.partner'].create({
+            'name': 'Attribution company',
+            'is_company': True,
+            'email': 'company@attribution.example.com',
+        })
+        cls.customer = cls.env['res.partner'].create({
+            'name': 'Attribution customer',
+            'parent_id': cls.company.id,
+            'email': 'Customer@Attribution.example.com',
+        })
+        cls.mailing_a, cls.mailing_b = cls.env['mailing.mailing'].create([{
+            'subject': f'Attribution {name}',
+            'body_html': '<p>Attribution</p>',
+        } for name in ('A', 'B')])
+
+    def _click(self, mailing, days_before, partner=None, model='res.partner', email=False):
+        """
+        Create a trace of ``mailing`` clicked ``days_before`` days before now,
+        sent to ``partner`` or to a record of ``model`` with ``email``.
+        """
+        if partner:
+            res_id = partner.id
+        else:
+            res_id = self.env[model].create({'name': 'Attribution recipient', 'email': email}).id
+        return self.env['mailing.trace'].create({
+            'mass_mailing_id': mailing.id,
+            'model': model,
+            'res_id': res_id,
+            'email': email or (partner and partner.email_normalized),
+            'trace_status': 'open',
+            'links_click_datetime': self.now - timedelta(days=days_before),
+        })
+
+    def _order(self, source=None):
+        """
+        Create an order of the customer and attribute it like at commit time.
+        """
+        order = self.env['sale.order'].create({
+            'partner_id': self.customer.id,
+            'date_order': self.now,
+            'source_id': source.id if source else False,
+        })
+        self.Attribution._flush_queued_orders()
+        return order
+
+    def _attribution(self, order):
+        return self.Attribution.search([('order_id', '=', order.id)])
+
+    def test_source_before_click(self):
+        self._click(self.mailing_b, 1, partner=self.customer)
+        attribution = self._attribution(self._order(source=self.mailing_a.source_id))
+        self.assertEqual(attribution.mailing_id, self.mailing_a)
+        self.assertEqual(attribution.attribution_type, 'source')
+
+    def test_last_click_single_touch(self):
+        self._click(self.mailing_a, 5, partner=self.customer)
+        last_click = self._click(self.mailing_b, 2, partner=self.customer)
+        attribution = self._attribution(self._order())
+        self.assertEqual(len(attribution), 1)
+        self.assertEqual(attribution.mailing_id, self.mailing_b)
+        self.assertEqual(attribution.attribution_type, 'partner_click')
+        self.assertEqual(attribution.trace_id, last_click)
+
+    def test_company_click(self):
+        click = self._click(self.mailing_a, 2, partner=self.company)
+        attribution = self._attribution(self._order())
+        self.assertEqual(attribution.mailing_id, self.mailing_a)
+        self.assertEqual(attribution.trace_id, click)
+
+    def test_mailing_contact_click(self):
+        # Traces of mailing contacts match the customer on the normalized email
+        click = self._click(self.mailing_a, 2, model='mailing.contact', email='customer@attribution.example.com')
+        attribution = self._attribution(self._order())
+        self.assertEqual(attribution.mailing_id, self.mailing_a)
+        self.assertEqual(attribution.trace_id, click)
+
+    def test_attribution_window(self):
+        self._click(self.mailing_a, 40, partner=self.customer)
+        order = self._order()
+        self.assertFalse(self._attribution(order))
+
+        ICP = self.env['ir.config_parameter']
+        ICP.set_param('dashboard_metricas_mail.attribution_window_days', '60')
+        self.Attribution._refresh_orders(order.ids)
+        self.assertEqual(self._attribution(order).mailing_id, self.mailing_a)
+
+        # 0 disables the click attribution
+        ICP.set_param('dashboard_metricas_mail.attribution_window_days', '0')
+        self.Attribution._refresh_orders(order.ids)
+        self.assertFalse(self._attribution(order))
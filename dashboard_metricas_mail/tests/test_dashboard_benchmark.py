@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from odoo import release
+from odoo.tests import TransactionCase, tagged
+
+from ..models.marketing_dashboard_handler import DASHBOARD_PANELS, TRACE_PANELS
+from ..tools.dashboard_cache import get_dashboard_cache
+from .common import DashboardDataGenerator
+
+_logger = logging.getLogger(__name__)
+
+# Comma separated numbers of traces to measure, with optional k / M suffixes (e.g. "10k,1M,10M")
+SIZES_ENV = 'DASHBOARD_BENCHMARK_SIZES'
+DEFAULT_SIZES = '10k'
+# Number of timed runs of each method
+REPEAT_ENV = 'DASHBOARD_BENCHMARK_REPEAT'
+DEFAULT_REPEAT = 3
+# Path of the JSON report (a timestamped file of the temporary directory by default)
+OUTPUT_ENV = 'DASHBOARD_BENCHMARK_OUTPUT'
+
+
+def parse_sizes(value):
+    multipliers = {'k': 1000, 'm': 1000000}
+    sizes = []
+    for item in value.split(','):
+        item = item.strip().lower()
+        if not item:
+            continue
+        multiplier = multipliers.get(item[-1], 1)
+        sizes.append(int(float(item.rstrip('km')) * multiplier))
+    return sorted(sizes)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'dashboard_benchmark')
+class TestDashboardBenchmark(TransactionCase):
+    """
+    Time every dashboard entry point and count its queries on growing
+    synthetic datasets. Not part of the standard test run, launch it with:
+
+        DASHBOARD_BENCHMARK_SIZES=10k,1M odoo-bin -d <db> -i dashboard_metricas_mail \
+            --test-tags dashboard_benchmark --stop-after-init
+
+    The data is generated inside the test transaction and rolled back at the end.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sizes = parse_sizes(os.environ.get(SIZES_ENV) or DEFAULT_SIZES)
+        cls.repeat = max(1, int(os.environ.get(REPEAT_ENV) or DEFAULT_REPEAT))
+        cls.handler = cls.env['marketing.dashboard.handler']
+        # Measure the computation, not the dashboard cache nor the snapshots
+        cls.env['ir.config_parameter'].set_param('dashboard_metricas_mail.cache_ttl', 0)
+        cls.env['ir.config_parameter'].set_param('dashboard_metricas_mail.snapshot_max_age', 0)
+        cls.env['ir.config_parameter'].set_param('dashboard_metricas_mail.use_rollup', False)
+        # The generated data is never committed, a read replica would not see it
+        cls.env['ir.config_parameter'].set_param('dashboard_metricas_mail.replica_max_lag', -1)
+
+    def _measure(self, method):
+        """
+        Run ``method`` self.repeat times with a cold ORM cache and return its
+        timings (milliseconds) and the number of queries of the last run.
+        """
+        cr = self.env.cr
+        timings = []
+        for _run in range(self.repeat):
+            self.env.invalidate_all()
+            queries = cr.sql_log_count
+            start = time.perf_counter()
+            method()
+            timings.append((time.perf_counter() - start) * 1000)
+            queries = cr.sql_log_count - queries
+        return {
+            'queries': queries,
+            'min_ms': round(min(timings), 2),
+            'median_ms': round(statistics.median(timings), 2),
+            'max_ms': round(max(timings), 2),
+        }
+
+    def _get_benchmarks(self):
+        """
+        (name, callable) of every measured entry point, unfiltered and
+        filtered on the largest campaign.
+        """
+        handler = self.handler
+        [(campaign,)] = self.env['mailing.mailing']._read_group(
+            [('campaign_id', '!=', False)], ['campaign_id'], order='__count desc', limit=1,
+        ) or [(self.env['utm.campaign'],)]
+        mailing = self.env['mailing.mailing'].search([('campaign_id', '=', campaign.id)], limit=1)
+        campaign_domain = handler._build_mailing_domain(campaign.id)
+        today = self.env.cr.now().date()
+
+        benchmarks = [
+            ('get_dashboard_data', lambda: handler.get_dashboard_data()),
+            ('get_dashboard_data[campaign]', lambda: handler.get_dashboard_data(campaign_id=campaign.id)),
+            ('get_dashboard_data[mailing]', lambda: handler.get_dashboard_data(mailing_id=mailing.id)),
+            ('get_dashboard_data[current_month]', lambda: handler.get_dashboard_data(
+                date_from=str(today.replace(day=1)), date_to=str(today),
+            )),
+        ]
+        for suffix, domain in (('', []), ('[campaign]', campaign_domain)):
+            benchmarks += [
+                (f'get_deliverability_metrics{suffix}', lambda domain=domain: handler.get_deliverability_metrics(domain)),
+                (f'get_engagement_metrics{suffix}', lambda domain=domain: handler.get_engagement_metrics(domain)),
+                (f'get_conversion_metrics{suffix}', lambda domain=domain: handler.get_conversion_metrics(domain)),
+                (f'get_top_links{suffix}', lambda domain=domain: handler.get_top_links(domain)),
+                (f'get_top_campaigns{suffix}', lambda domain=domain: handler.get_top_campaigns(domain)),
+                (f'get_top_mailings{suffix}', lambda domain=domain: handler.get_top_mailings(domain)),
+                (f'get_ab_testing_metrics{suffix}', lambda domain=domain: handler.get_ab_testing_metrics(domain)),
+            ]
+        benchmarks += [
+            ('get_list_health_metrics', lambda: handler.get_list_health_metrics()),
+            ('get_campaign_stages', lambda: handler.get_campaign_stages()),
+            ('get_link_ranking', lambda: handler.get_link_ranking()),
+            ('get_link_ranking[page_2]', lambda: handler.get_link_ranking(offset=50)),
+            ('get_filter_options', lambda: handler.get_filter_options()),
+            ('search_filter_options[mailing]', lambda: handler.search_filter_options('mailing', 'Benchmark')),
+        ]
+        for metric in ('opens', 'clicks', 'bounces', 'revenue'):
+            benchmarks.append((
+                f'get_metric_timeseries[{metric}]',
+                lambda metric=metric: handler.get_metric_timeseries(metric, 'day'),
+            ))
+        return benchmarks
+
+    def _run_size(self):
+        # Full rebuild of the order attribution read by the revenue sections
+        Attribution = self.env['marketing.dashboard.attribution']
+        results = {'attribution_refresh': self._measure(lambda: Attribution._refresh_orders(None))}
+        results.update((name, self._measure(method)) for name, method in self._get_benchmarks())
+
+        # Same dashboard read from the daily rollup
+        DailyStat = self.env['marketing.dashboard.daily.stat']
+        results['daily_stat_refresh'] = self._measure(lambda: DailyStat._refresh_mailings(None))
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.use_rollup', True)
+        results['get_dashboard_data[rollup]'] = self._measure(lambda: self.handler.get_dashboard_data())
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.use_rollup', False)
+
+        # Default page load: one call per panel group of the client, sharing the
+        # resolved filters and the trace aggregation through the dashboard cache
+        panel_groups = [[panel for panel in DASHBOARD_PANELS if panel in TRACE_PANELS]]
+        panel_groups += [[panel] for panel in DASHBOARD_PANELS if panel not in TRACE_PANELS]
+        cache = get_dashboard_cache(self.env.cr.dbname)
+
+        def load_panels():
+            cache.clear()
+            for panels in panel_groups:
+                self.handler.get_panels_data(panels)
+
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.cache_ttl', 300)
+        results['get_panels_data[page_load]'] = self._measure(load_panels)
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.cache_ttl', 0)
+        cache.clear()
+
+        # Estimated trace counters (approximate mode without exact attempt)
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.approximate_mode', True)
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.exact_timeout_ms', 0)
+        results['get_deliverability_metrics[approximate]'] = self._measure(
+            lambda: self.handler.get_deliverability_metrics([]),
+        )
+        self.env['ir.config_parameter'].set_param('dashboard_metricas_mail.approximate_mode', False)
+        return results
+
+    def test_dashboard_benchmark(self):
+        generator = DashboardDataGenerator(self.env)
+        report = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'odoo_version': release.version,
+            'postgresql_version': self.env.cr._cnx.server_version,
+            'repeat': self.repeat,
+            'sizes': [],
+        }
+        for size in self.sizes:
+            start = time.perf_counter()
+            generator.generate(size - generator.traces)
+            _logger.info("Dashboard benchmark: generated %s traces in %.1fs", size, time.perf_counter() - start)
+            report['sizes'].append({
+                'traces': size,
+                'results': self._run_size(),
+            })
+
+        output = os.environ.get(OUTPUT_ENV) or os.path.join(
+            tempfile.gettempdir(), f"dashboard_benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json",
+        )
+        with open(output, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+        _logger.info("Dashboard benchmark report written to %s", output)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+from ..models.marketing_dashboard_daily_stat import TRACE_COUNTERS
+
+
+@tagged('-at_install', 'post_install')
+class TestDashboardDailyStat(TransactionCase):
+    """
+    The daily rollup must give the same totals as the live aggregation of
+    the traces and of the attributed orders, revenue in another currency
+    included.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.handler = cls.env['marketing.dashboard.handler']
+        company = cls.env.company
+        campaign = cls.env['utm.campaign'].create({'name': 'Daily stat campaign'})
+        mailing = cls.env['mailing.mailing'].create({
+            'subject': 'Daily stat mailing',
+            'body_html': '<p>Daily stat</p>',
+            'campaign_id': campaign.id,
+        })
+        now = fields.Datetime.now()
+        partner = cls.env['res.partner'].create({'name': 'Daily stat customer'})
+        cls.env['mailing.trace'].create([{
+            'mass_mailing_id': mailing.id,
+            'model': 'res.partner',
+            'res_id': partner.id,
+            'trace_status': status,
+            'open_datetime': now if status in ('open', 'reply') else False,
+            'links_click_datetime': now if status == 'reply' else False,
+            'reply_datetime': now if status == 'reply' else False,
+        } for status in ('sent', 'sent', 'open', 'reply', 'bounce', 'error')])
+
+        foreign = cls.env.ref('base.EUR') if company.currency_id != cls.env.ref('base.EUR') else cls.env.ref('base.USD')
+        foreign.active = True
+        cls.env['res.currency.rate'].create({
+            'currency_id': foreign.id,
+            'company_id': company.id,
+            'name': fields.Date.context_today(cls.handler),
+            'rate': 2.0,
+        })
+        orders = cls.env['sale.order'].create([{
+            'partner_id': partner.id,
+            'source_id': mailing.source_id.id,
+            'date_order': now - timedelta(days=days),
+        } for days in range(4)])
+        cls.env.flush_all()
+        # Invoicing is out of scope, set the order figures directly
+        for order, state, invoice_status, amount, currency in zip(orders, (
+            ('sale', 'invoiced', 100, company.currency_id),
+            ('sale', 'invoiced', 30, foreign),
+            ('draft', 'no', 50, company.currency_id),
+            ('sale', 'to invoice', 20, foreign),
+        )):
+            cls.env.cr.execute(SQL(
+                """
+                UPDATE sale_order
+                   SET state = %s, invoice_status = %s, amount_total = %s, currency_id = %s
+                 WHERE id = %s
+                """,
+                state, invoice_status, amount, currency.id, order.id,
+            ))
+        cls.env.invalidate_all()
+        cls.env['marketing.dashboard.attribution']._flush_queued_orders()
+        cls.env['marketing.dashboard.daily.stat']._refresh_mailings(mailing.ids)
+
+        cls.domain = cls.handler._build_mailing_domain(campaign.id)
+        cls.filters = cls.handler._resolve_filters(cls.domain)
+
+    def test_trace_totals(self):
+        live = self.handler._get_trace_stats(self.filters)
+        rollup = self.handler._get_trace_stats(self.filters, use_rollup=True)
+        self.assertEqual({name: rollup[name] for name in TRACE_COUNTERS}, {name: live[name] for name in TRACE_COUNTERS})
+        self.assertEqual(live['total'], 6)
+
+    def test_conversion_totals(self):
+        live = self.handler.get_conversion_metrics(self.domain, filters=self.filters)
+        rollup = self.handler.get_conversion_metrics(self.domain, filters=self.filters, use_rollup=True)
+        for name in ('potential_revenue', 'potential_conversions', 'total_revenue', 'total_conversions', 'conversion_rate'):
+            self.assertAlmostEqual(rollup[name], live[name], places=2, msg=name)
+        self.assertEqual(live['total_conversions'], 2)
+        self.assertEqual(live['potential_conversions'], 2)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+
+@tagged('-at_install', 'post_install')
+class TestDashboardLinkRanking(TransactionCase):
+    """
+    The link ranking counts the clicks of the filtered mailings within the
+    date window, sorts every link before the page is cut, and counts unique
+    clicks per trace (or per IP for the clicks without trace).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.handler = cls.env['marketing.dashboard.handler']
+        cls.mailing, cls.other_mailing = cls.env['mailing.mailing'].create([{
+            'subject': f'Link ranking {name}',
+            'body_html': '<p>Link ranking</p>',
+        } for name in ('filtered', 'other')])
+        # The most clicked link is created last: ranking on the id would put it last
+        cls.link_c, cls.link_b, cls.link_a = cls.env['link.tracker'].create([{
+            'url': f'https://example.com/ranking/{name}',
+            'title': f'Link ranking {name}',
+        } for name in ('c', 'b', 'a')])
+        trace = cls.env['mailing.trace'].create({
+            'mass_mailing_id': cls.mailing.id,
+            'model': 'res.partner',
+            'res_id': cls.env.user.partner_id.id,
+        })
+
+        def click(link, mailing, ip, trace=False):
+            return {'link_id': link.id, 'mass_mailing_id': mailing.id, 'ip': ip, 'mailing_trace_id': trace and trace.id}
+
+        cls.env['link.tracker.click'].create([
+            # 3 clicks from 2 IPs, plus an older one out of the date window
+            click(cls.link_a, cls.mailing, '10.0.0.1'),
+            click(cls.link_a, cls.mailing, '10.0.0.1'),
+            click(cls.link_a, cls.mailing, '10.0.0.2'),
+            # 2 clicks of the same trace from 2 IPs
+            click(cls.link_b, cls.mailing, '10.0.0.3', trace),
+            click(cls.link_b, cls.mailing, '10.0.0.4', trace),
+            click(cls.link_c, cls.mailing, '10.0.0.5'),
+            # Clicks of another mailing are not counted
+            *(click(cls.link_c, cls.other_mailing, f'10.0.1.{index}') for index in range(5)),
+        ])
+        old_click = cls.env['link.tracker.click'].create(click(cls.link_c, cls.mailing, '10.0.0.6'))
+        cls.env.flush_all()
+        cls.env.cr.execute(SQL(
+            "UPDATE link_tracker_click SET create_date = %s WHERE id = %s",
+            fields.Datetime.now() - timedelta(days=10), old_click.id,
+        ))
+        cls.env.invalidate_all()
+        cls.date_from = fields.Date.to_string(fields.Date.context_today(cls.handler) - timedelta(days=1))
+
+    def _ranking(self, **kwargs):
+        return self.handler.get_link_ranking(mailing_id=self.mailing.id, date_from=self.date_from, **kwargs)
+
+    def test_filtered_counts(self):
+        ranking = self._ranking()
+        self.assertEqual(ranking['total'], 3)
+        self.assertEqual(
+            [(link['id'], link['count'], link['unique_count']) for link in ranking['links']],
+            [(self.link_a.id, 3, 2), (self.link_b.id, 2, 1), (self.link_c.id, 1, 1)],
+        )
+
+    def test_date_window(self):
+        counts = {link['id']: link['count'] for link in self.handler.get_link_ranking(mailing_id=self.mailing.id)['links']}
+        self.assertEqual(counts[self.link_c.id], 2)
+
+    def test_pages(self):
+        first_page = self._ranking(limit=2)
+        self.assertEqual([link['id'] for link in first_page['links']], [self.link_a.id, self.link_b.id])
+        self.assertEqual(first_page['total'], 3)
+
+        last_page = self._ranking(limit=2, offset=2)
+        self.assertEqual([link['id'] for link in last_page['links']], [self.link_c.id])
+        self.assertEqual(last_page['total'], 3)
+
+        # A page after the last link still counts them
+        empty_page = self._ranking(limit=2, offset=4)
+        self.assertEqual(empty_page['links'], [])
+        self.assertEqual(empty_page['total'], 3)
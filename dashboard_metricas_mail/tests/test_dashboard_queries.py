@@ -0,0 +1,87 @@
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+# Number of ranked links and mailings, the size of the default rankings
+RANKED_COUNT = 5
+
+
+@tagged('-at_install', 'post_install')
+class TestDashboardQueries(TransactionCase):
+    """
+    The rankings must run the same number of queries whatever the number of
+    ranked records: no query per link or per mailing.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.handler = cls.env['marketing.dashboard.handler']
+        cls.mailing_list = cls.env['mailing.list'].create({'name': 'Query count list'})
+        cls.customer = cls.env['res.partner'].create({'name': 'Query count customer'})
+        cls.single_domain = cls._create_campaign('Single', 1)
+        cls.many_domain = cls._create_campaign('Many', RANKED_COUNT)
+
+    @classmethod
+    def _create_campaign(cls, name, count):
+        """
+        Create a campaign of ``count`` mailings, each with one clicked link and
+        one invoiced order attributed through its UTM source. Returns the
+        mailing domain of the campaign.
+        """
+        campaign = cls.env['utm.campaign'].create({'name': f'Query count {name}'})
+        mailings = cls.env['mailing.mailing'].create([{
+            'subject': f'Query count {name} {index}',
+            'body_html': '<p>Query count</p>',
+            'campaign_id': campaign.id,
+            'contact_list_ids': [(4, cls.mailing_list.id)],
+        } for index in range(count)])
+        links = cls.env['link.tracker'].create([{
+            'url': f'https://example.com/{name.lower()}/{index}',
+            'title': f'Query count {name} {index}',
+        } for index in range(count)])
+        cls.env['link.tracker.click'].create([{
+            'link_id': link.id,
+            'mass_mailing_id': mailing.id,
+            'campaign_id': campaign.id,
+            'ip': f'10.0.0.{click}',
+        } for index, (link, mailing) in enumerate(zip(links, mailings)) for click in range(index + 1)])
+
+        orders = cls.env['sale.order'].create([{
+            'partner_id': cls.customer.id,
+            'source_id': mailing.source_id.id,
+        } for mailing in mailings])
+        cls.env.flush_all()
+        # Invoicing is out of scope, mark the orders as invoiced directly
+        cls.env.cr.execute(SQL(
+            """
+            UPDATE sale_order
+               SET state = 'sale', invoice_status = 'invoiced', amount_total = 100 * id
+             WHERE id IN %s
+            """,
+            tuple(orders.ids),
+        ))
+        cls.env.invalidate_all()
+        cls.env['marketing.dashboard.attribution']._flush_queued_orders()
+        return cls.handler._build_mailing_domain(campaign.id)
+
+    def _assert_constant_queries(self, method):
+        """
+        Count the queries of ``method`` on the single record campaign, then
+        check that the campaign with RANKED_COUNT records does not need more.
+        """
+        # Warm the registry caches (system parameters, ...) shared by both runs
+        method(self.single_domain)
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        self.assertEqual(len(method(self.single_domain)), 1)
+        expected = self.env.cr.sql_log_count - queries
+
+        self.env.invalidate_all()
+        with self.assertQueryCount(expected):
+            self.assertEqual(len(method(self.many_domain)), RANKED_COUNT)
+
+    def test_top_links_queries(self):
+        self._assert_constant_queries(self.handler.get_top_links)
+
+    def test_top_mailings_queries(self):
+        self._assert_constant_queries(self.handler.get_top_mailings)
@@ -0,0 +1,3 @@
+from . import dashboard_cache
+from . import replica
+from . import incremental_refresh
@@ -0,0 +1,116 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class DashboardCache:
+    """
+    Thread-safe LRU cache with a time-to-live, used to store dashboard payloads.
+    Entries expire after ``ttl`` seconds, or after their own shorter max_age,
+    and the least recently used entry is evicted once ``max_size`` entries
+    are stored.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        # Lock of every key being computed by get_or_compute
+        self._computing = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key, ttl):
+        """
+        Return the (stored_at, value, max_age) entry of ``key`` if it is still
+        fresh, dropping it once expired. Must be called under the lock.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, _value, max_age = entry
+        if time.monotonic() - stored_at < min(ttl, max_age or ttl):
+            self._entries.move_to_end(key)
+            return entry
+        del self._entries[key]
+        return None
+
+    def get(self, key, ttl):
+        """
+        Return a copy of the cached value for ``key``, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._lookup(key, ttl)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Callers may decorate the payload, never hand out the stored object
+            return copy.deepcopy(entry[1])
+
+    def get_or_compute(self, key, ttl, compute, max_size):
+        """
+        Return (value, max_age) for ``key``, where ``compute()`` returns the
+        (value, max_age) to store when it is missing or expired; max_age
+        (seconds) shortens the lifetime of that entry below ``ttl`` when set.
+        Concurrent misses of the same key wait for the first computation
+        instead of running it again, e.g. when the dashboard panels requested
+        together all need the same resolved filters.
+        """
+        with self._lock:
+            entry = self._lookup(key, ttl)
+            if entry is not None:
+                self.hits += 1
+                return copy.deepcopy(entry[1]), entry[2]
+            self.misses += 1
+            key_lock = self._computing.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                with self._lock:
+                    entry = self._lookup(key, ttl)
+                    if entry is not None:
+                        # Computed by the thread we waited for
+                        return copy.deepcopy(entry[1]), entry[2]
+                value, max_age = compute()
+                self.set(key, value, max_size, max_age=max_age)
+                return value, max_age
+        finally:
+            with self._lock:
+                if self._computing.get(key) is key_lock:
+                    del self._computing[key]
+
+    def set(self, key, value, max_size, max_age=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value), max_age)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits / lookups * 100) if lookups else 0,
+            }
+
+
+# One cache per database, shared by all the threads of the current process
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_dashboard_cache(dbname):
+    with _caches_lock:
+        if dbname not in _caches:
+            _caches[dbname] = DashboardCache()
+        return _caches[dbname]
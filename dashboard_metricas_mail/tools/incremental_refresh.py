@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from odoo import fields
+
+# Rows written by transactions still running when the previous refresh started
+# carry an older write_date, so each refresh looks back a little further
+HWM_OVERLAP = timedelta(minutes=10)
+
+
+def run_incremental_refresh(env, hwm_param, refresh_since, refresh_all, incremental=True):
+    """
+    Call ``refresh_since(since)`` with the write_date high-water mark stored
+    in the ``hwm_param`` system parameter (minus HWM_OVERLAP), or
+    ``refresh_all()`` on the first run, after the parameter was removed, or
+    when ``incremental`` is False. The start of this run becomes the new mark.
+    """
+    ICP = env['ir.config_parameter'].sudo()
+    run_started = env.cr.now()
+    hwm = ICP.get_param(hwm_param)
+
+    if hwm and incremental:
+        refresh_since(fields.Datetime.to_datetime(hwm) - HWM_OVERLAP)
+    else:
+        refresh_all()
+
+    ICP.set_param(hwm_param, fields.Datetime.to_string(run_started))
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extensions import make_dsn, parse_dsn
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Server configuration options (odoo.conf): libpq connection string of the read
+# replica, the database name defaulting to the one of the request, and the
+# maximum number of pooled connections per database
+DSN_OPTION = 'dashboard_replica_dsn'
+MAXCONN_OPTION = 'dashboard_replica_maxconn'
+DEFAULT_MAXCONN = 4
+# Seconds a measured replication lag is reused, and seconds an unreachable
+# replica is left alone before being tried again
+LAG_CHECK_INTERVAL = 10
+RETRY_INTERVAL = 60
+
+# Lag of the replica reads of the current thread, collected by track_lag()
+_lag_tracker = threading.local()
+
+
+@contextmanager
+def track_lag():
+    """
+    Yield a dict whose 'lag' ends up being the largest replication lag
+    (seconds) of the replica reads made within the block, 0 when every row
+    came from the primary or from a replica in sync. Nested blocks also
+    report their lag to the enclosing one.
+    """
+    outer = getattr(_lag_tracker, 'current', None)
+    tracked = _lag_tracker.current = {'lag': 0}
+    try:
+        yield tracked
+    finally:
+        _lag_tracker.current = outer
+        if outer is not None:
+            outer['lag'] = max(outer['lag'], tracked['lag'])
+
+
+def report_lag(lag):
+    """
+    Account for rows that are ``lag`` seconds behind the primary in the
+    current track_lag() block, if any.
+    """
+    tracked = getattr(_lag_tracker, 'current', None)
+    if tracked is not None and lag > tracked['lag']:
+        tracked['lag'] = lag
+
+
+class ReplicaPool:
+    """
+    Pooled read-only connections to the replica of one database, with a
+    periodic replication lag check. Whenever the replica cannot answer, it is
+    reported as unavailable (None) so that callers use the primary instead.
+    """
+
+    def __init__(self, dsn, maxconn):
+        self.dsn = dsn
+        self.maxconn = maxconn
+        self._lock = threading.Lock()
+        self._pool = None
+        self._lag = None
+        self._lag_checked_at = 0
+        self._down_until = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(0, self.maxconn, self.dsn)
+            return self._pool
+
+    def _mark_down(self, error):
+        _logger.warning("Dashboard read replica unavailable, using the primary for %ss: %s", RETRY_INTERVAL, error)
+        with self._lock:
+            self._down_until = time.monotonic() + RETRY_INTERVAL
+            self._lag_checked_at = 0
+
+    def _measure_lag(self, cr):
+        """
+        Replication lag in seconds, 0 when every received change is replayed
+        (however old the last replayed transaction) or when the target is not
+        a standby at all.
+        """
+        cr.execute("""
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            END
+        """)
+        return float(cr.fetchone()[0])
+
+    def execute(self, query, max_lag, timeout=None):
+        """
+        Run ``query`` (an odoo.tools.SQL) in a read-only transaction of the
+        replica and return its rows, or None when the replica is unreachable,
+        out of connections or more than ``max_lag`` seconds behind.
+        QueryCanceled is raised when ``timeout`` (milliseconds) is exceeded.
+        """
+        now = time.monotonic()
+        if now < self._down_until:
+            return None
+        try:
+            pool = self._get_pool()
+            connection = pool.getconn()
+        except PoolError:
+            # Every connection is busy, this query goes to the primary
+            return None
+        except psycopg2.Error as error:
+            self._mark_down(error)
+            return None
+
+        broken = False
+        try:
+            connection.set_session(readonly=True)
+            with connection.cursor() as cr:
+                if now - self._lag_checked_at > LAG_CHECK_INTERVAL:
+                    self._lag = self._measure_lag(cr)
+                    self._lag_checked_at = now
+                if self._lag > max_lag:
+                    _logger.debug("Dashboard read replica is %.1fs behind, using the primary", self._lag)
+                    return None
+                if timeout:
+                    cr.execute("SET LOCAL statement_timeout = %s", [int(timeout)])
+                cr.execute(query.code, query.params)
+                rows = cr.fetchall()
+                report_lag(self._lag)
+                return rows
+        except psycopg2.errors.QueryCanceled:
+            raise
+        except psycopg2.Error as error:
+            broken = True
+            self._mark_down(error)
+            return None
+        finally:
+            if not connection.closed:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    broken = True
+            pool.putconn(connection, close=broken or bool(connection.closed))
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_replica_pool(dbname):
+    """
+    Return the shared ReplicaPool of ``dbname``, or None when no replica is configured.
+    """
+    dsn = config.get(DSN_OPTION)
+    if not dsn:
+        return None
+    try:
+        if 'dbname' not in parse_dsn(dsn):
+            dsn = make_dsn(dsn, dbname=dbname)
+    except psycopg2.ProgrammingError:
+        _logger.error("Invalid %s option, the dashboard reads from the primary", DSN_OPTION)
+        return None
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            maxconn = int(config.get(MAXCONN_OPTION) or DEFAULT_MAXCONN)
+            pool = _pools[dsn] = ReplicaPool(dsn, maxconn)
+        return pool